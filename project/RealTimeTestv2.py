@@ -1,11 +1,8 @@
 import time
 import numpy as np
-import tensorflow as tf
 from pyomyo import Myo, emg_mode
-from sklearn.preprocessing import MinMaxScaler
 from collections import deque
 import sys  # Para actualizar la línea en tiempo real
-import os
 import requests
 import json
 
@@ -21,12 +18,23 @@ prediccion_etiquetas = {
     5: 'Mano Afuera'
 }
 
-# Cargar el modelo LSTM previamente entrenado
-modelo = tf.keras.models.load_model("modelo_LSTM.keras")
+# El modelo LSTM se carga al empezar la captura, no al importar el módulo,
+# así importar tiemporeal desde el servidor no carga TensorFlow
+modelo = None
 
-# Normalización con el rango de Myo (0 a 1023)
-scaler = MinMaxScaler(feature_range=(0, 1))
-scaler.fit(np.array([[0] * 8, [1023] * 8]))  # Ajuste basado en el rango de Myo
+def cargar_modelo():
+    """
+    Carga el modelo LSTM previamente entrenado, solo la primera vez.
+    """
+    global modelo
+    if modelo is None:
+        import tensorflow as tf
+        modelo = tf.keras.models.load_model("modelo_LSTM.keras")
+    return modelo
+
+# Normalización con el rango de Myo (0 a 1023), lo mismo que
+# MinMaxScaler(feature_range=(0, 1)) ajustado a [0] * 8 y [1023] * 8, sin cargar sklearn
+MYO_MAX = 1023.0
 
 # Parámetros de la ventana deslizante
 SECUENCIA_LONGITUD = 100  # 100 muestras
@@ -44,8 +52,6 @@ ultima_prediccion = None
 ultima_confianza = 0.0  # Guardar la confianza anterior para actualizar en tiempo real
 m = None  # Definir Myo a nivel global para cerrarlo después
 
-import os
-
 def process_data():
     """
     Procesa los datos EMG en tiempo real, actualizando la confianza en la misma línea.
@@ -59,7 +65,7 @@ def process_data():
     datos_emg = np.array(buffer_emg, dtype=np.float32).reshape(1, SECUENCIA_LONGITUD, 8)
 
     # Normalizar los datos de la secuencia
-    datos_emg_norm = scaler.transform(datos_emg.reshape(-1, 8)).reshape(1, SECUENCIA_LONGITUD, 8)
+    datos_emg_norm = datos_emg / MYO_MAX
 
     # Hacer la predicción con el modelo LSTM
     prediccion = modelo.predict(datos_emg_norm, verbose=0)  # Obtiene probabilidades
@@ -85,14 +91,8 @@ def process_data():
     # 🔹 Delay para evitar que se actualice excesivamente rápido
     time.sleep(DELAY_PREDICCION)
 
-    # 🔹 Capturar salida estándar temporalmente para evitar el mensaje "Clearning"
-    original_stdout = sys.stdout
-    sys.stdout = open(os.devnull, 'w')  # Redirigir salida a /dev/null en Linux/Mac o nul en Windows
-    try:
-        buffer_emg.clear()
-    except:
-        pass  # En caso de error, ignorarlo
-    sys.stdout = original_stdout  # Restaurar salida estándar
+    # 🔹 Empezar la siguiente ventana desde cero
+    buffer_emg.clear()
 
 
 def tiemporeal():
@@ -104,7 +104,11 @@ def tiemporeal():
     m = None
 
     try:
-        m = Myo(mode=emg_mode.PREPROCESSED)
+        # Cargar el modelo antes de conectar, así la primera ventana no espera a TensorFlow
+        cargar_modelo()
+
+        # Recuerda el último Myo para reconectar sin escanear
+        m = Myo(mode=emg_mode.PREPROCESSED, cache=True)
 
         if hasattr(m, 'emg_handlers'):
             m.emg_handlers = []
@@ -122,8 +126,10 @@ def tiemporeal():
 
         print("\nInicio de captura en tiempo real. Presiona Ctrl+C para salir.")
 
+        # El Myo se lee en su propio hilo, así la predicción no detiene el puerto serie
+        m.start()
         while True:
-            m.run()
+            time.sleep(1)
 
     except KeyboardInterrupt:
         print("\nCaptura interrumpida manualmente.")
@@ -133,6 +139,7 @@ def tiemporeal():
         if m:
             try:
                 print("\nDesconectando Myo...")
+                m.stop()
                 m.disconnect()
                 print("Myo desconectado correctamente.")
             except Exception as e:
@@ -0,0 +1,68 @@
+# bench_startup.py
+"""
+Mide el arranque en frío del servidor y del proceso de tiempo real, cada uno
+en un intérprete nuevo, con el desglose de `python -X importtime`.
+
+    python project/bench_startup.py [repeticiones] [módulos a mostrar]
+
+Para cada caso muestra el tiempo total (mediana) y los imports de primer
+nivel que más tardan, con lo que importan ellos mismos incluido.
+"""
+import os
+import re
+import subprocess
+import sys
+import time
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+
+CASOS = {
+    # Lo que hace `python server.py` antes de app.run()
+    'servidor': "import server",
+    # Lo que hace el servidor al activar el tiempo real
+    'import tiemporeal': "from RealTimeTestv2 import tiemporeal",
+    # Lo que hace el proceso de tiempo real antes de conectar al Myo
+    'proceso tiempo real': "import RealTimeTestv2; RealTimeTestv2.cargar_modelo()",
+}
+
+LINEA = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+def medir(codigo):
+    """
+    Ejecuta codigo en un intérprete nuevo, devuelve los segundos totales y
+    {módulo: segundos acumulados} de los imports de primer nivel.
+    """
+    inicio = time.perf_counter()
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo],
+                       cwd=CARPETA, capture_output=True, text=True)
+    total = time.perf_counter() - inicio
+    if r.returncode != 0:
+        raise RuntimeError(r.stderr.strip().splitlines()[-1])
+    modulos = {}
+    for linea in r.stderr.splitlines():
+        m = LINEA.match(linea)
+        # Un solo espacio de sangría: importado directamente por el código medido
+        if m and len(m.group(3)) == 1:
+            modulos[m.group(4)] = int(m.group(2)) / 1e6
+    return total, modulos
+
+def mediana(xs):
+    xs = sorted(xs)
+    return xs[len(xs) // 2]
+
+if __name__ == "__main__":
+    repeticiones = int(sys.argv[1]) if len(sys.argv) >= 2 else 3
+    mostrar = int(sys.argv[2]) if len(sys.argv) >= 3 else 8
+
+    for nombre, codigo in CASOS.items():
+        try:
+            medidas = [medir(codigo) for _ in range(repeticiones)]
+        except RuntimeError as e:
+            print(f"{nombre}: falló ({e})")
+            continue
+        total = mediana([t for t, _ in medidas])
+        # El desglose de la ejecución con el total mediano
+        _, modulos = min(medidas, key=lambda m: abs(m[0] - total))
+        print(f"{nombre}: {total * 1000:.0f} ms  ({codigo})")
+        for modulo, segundos in sorted(modulos.items(), key=lambda m: -m[1])[:mostrar]:
+            print(f"    {segundos * 1000:8.1f} ms  {modulo}")
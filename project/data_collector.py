@@ -2,8 +2,6 @@
 import time
 import multiprocessing
 import numpy as np
-import pandas as pd
-import msvcrt  # Para detectar teclas en Windows, usa 'input()' si usas otro sistema
 import os  # Para manejar archivos
 
 from pyomyo import Myo, emg_mode
@@ -32,22 +30,23 @@ def csvcreate():
         print(f"\nSe eliminó el archivo anterior: '{dataset_file}'")
 
     # Crear un nuevo archivo vacío con encabezados
-    pd.DataFrame(columns=myo_cols).to_csv(dataset_file, index=False)
+    # Solo la cabecera, sin cargar pandas en el proceso del servidor
+    with open(dataset_file, 'w') as f:
+        f.write(",".join(myo_cols) + "\n")
     print(f"\nSe ha creado un nuevo archivo: '{dataset_file}'")
 
 # ----------- FUNCIÓN PARA TOMAR LECTURAS -------------
 def data_worker(mode, seconds, etiqueta_num):
+    import pandas as pd  # Se carga en el proceso de recolección, no al arrancar el servidor
 
     collect = True
-    m = Myo(mode=mode)
+    m = Myo(mode=mode, cache=True)
     m.connect()
 
     myo_data = []
 
-    def add_to_queue(emg, movement):
-        myo_data.append(list(emg) + [etiqueta_num])
-
-    m.add_emg_handler(add_to_queue)
+    # Las muestras llegan en bloques (n, 8) de NumPy en lugar de una lista por muestra
+    m.add_emg_batch_handler(myo_data.append, size=50)
 
     m.set_leds([0, 128, 0], [0, 128, 0])
     m.vibrate(1)
@@ -60,12 +59,15 @@ def data_worker(mode, seconds, etiqueta_num):
             m.run()
         else:
             collect = False
+            m.flush_emg_batches()
             print(f"\nFinalizó la recolección de datos para: {prediccion_etiquetas[etiqueta_num]}")
             print(f"Tiempo de recolección: {time.time() - start_time:.2f} segundos")
-            print(f"{len(myo_data)} frames recogidos")
+            emg = np.vstack(myo_data) if myo_data else np.empty((0, 8))
+            print(f"{len(emg)} frames recogidos")
 
             # Guardar datos sobrescribiendo el archivo (ya fue recreado)
-            myo_df = pd.DataFrame(myo_data, columns=myo_cols)
+            etiquetas = np.full((len(emg), 1), etiqueta_num)
+            myo_df = pd.DataFrame(np.hstack([emg, etiquetas]), columns=myo_cols)
             myo_df.to_csv(dataset_file, mode='a', header=False, index=False)
 
             print(f"Datos guardados en {dataset_file}")
@@ -1,18 +1,16 @@
-import multiprocessing
-from pyomyo import Myo, emg_mode
-
-def _conexion_worker():
-    m = Myo(mode=emg_mode.PREPROCESSED)
-    m.connect()
-    m.disconnect()
+from pyomyo import Myo, emg_mode, BTTimeoutError
 
 def intentar_conectar(timeout=10):
-    p = multiprocessing.Process(target=_conexion_worker)
-    p.start()
-    p.join(timeout=timeout)
-
-    if p.is_alive():
-        p.terminate()
-        p.join()
+    # La conexión tiene su propio límite de tiempo, no hace falta otro proceso
+    m = None
+    try:
+        # Recuerda el último Myo para reconectar sin escanear
+        m = Myo(mode=emg_mode.PREPROCESSED, cache=True)
+        m.connect(timeout=timeout)
+        m.disconnect()
+        return True
+    except BTTimeoutError:
         return False
-    return True
+    finally:
+        if m:
+            m.close()
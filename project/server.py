@@ -4,7 +4,6 @@ from flask_cors import CORS
 import multiprocessing
 from pyomyo import emg_mode
 from data_collector import data_worker, csvcreate
-from LSTMnn import train
 from poweroff import power_off_myo
 from check_existence import Existence
 import json
@@ -52,6 +51,7 @@ realtime_process = None
 @app.route('/api/realtime', methods=['POST'])
 def realtime():
     global realtime_process
+    # Ya no carga TensorFlow: el modelo se carga dentro del proceso de tiempo real
     from RealTimeTestv2 import tiemporeal
 
     if realtime_process is None or not realtime_process.is_alive():
@@ -67,6 +67,8 @@ def realtime():
 @app.route('/api/train-model', methods=['POST'])
 def train_model():
     try:
+        # TensorFlow, pandas y seaborn se cargan solo al entrenar, no al arrancar el servidor
+        from LSTMnn import train
         success, val_acc = train()
         if success is True:
             ta = val_acc            
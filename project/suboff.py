@@ -6,7 +6,7 @@ from pyomyo import Myo, emg_mode
 def main():
     try:
         print('Hola')
-        m = Myo(mode=emg_mode.RAW)
+        m = Myo(mode=emg_mode.RAW, cache=True)
         m.connect()
         m.vibrate(1)
         time.sleep(2)
@@ -0,0 +1,81 @@
+'''
+Memory allocated per framed packet, measured with tracemalloc.
+Compares the Framer against the list based framer pyomyo used before it.
+
+	python benchmarks/bench_alloc.py [stream file]
+
+The stream file holds raw bytes as read from the dongle, without it a
+synthetic RAW EMG + IMU stream is used.
+'''
+
+import sys
+import tracemalloc
+
+from pyomyo import Framer, PACKET_TYPES
+
+from streams import raw_emg_stream
+
+class LegacyPacket(object):
+	def __init__(self, ords):
+		self.typ = ords[0]
+		self.cls = ords[2]
+		self.cmd = ords[3]
+		self.payload = bytes(ords[4:])
+
+class LegacyFramer(object):
+	'''The list of ints framer from BT.proc_byte, before the Framer.'''
+	def __init__(self):
+		self.buf = []
+		self.packet_len = 0
+
+	def feed(self, data):
+		packets = []
+		for c in data:
+			if not self.buf:
+				if c in PACKET_TYPES:
+					self.buf.append(c)
+				continue
+			elif len(self.buf) == 1:
+				self.buf.append(c)
+				self.packet_len = 4 + (self.buf[0] & 0x07) + self.buf[1]
+				continue
+			else:
+				self.buf.append(c)
+
+			if self.packet_len and len(self.buf) == self.packet_len:
+				packets.append(LegacyPacket(self.buf))
+				self.buf = []
+		return packets
+
+def measure(framer, data, chunk=256):
+	'''Returns (packets, allocated blocks per packet, bytes per packet, peak bytes per chunk).'''
+	tracemalloc.start()
+	before = tracemalloc.take_snapshot()
+	tracemalloc.reset_peak()
+	packets = []
+	peak = 0
+	for i in range(0, len(data), chunk):
+		start, _ = tracemalloc.get_traced_memory()
+		tracemalloc.reset_peak()
+		packets.extend(framer.feed(data[i:i + chunk]))
+		_, p = tracemalloc.get_traced_memory()
+		peak = max(peak, p - start)
+	after = tracemalloc.take_snapshot()
+	tracemalloc.stop()
+
+	stats = after.compare_to(before, 'filename')
+	blocks = sum(s.count_diff for s in stats if s.count_diff > 0)
+	size = sum(s.size_diff for s in stats if s.size_diff > 0)
+	n = len(packets)
+	return n, blocks / n, size / n, peak
+
+if __name__ == '__main__':
+	if len(sys.argv) >= 2:
+		with open(sys.argv[1], 'rb') as f:
+			data = f.read()
+	else:
+		data = raw_emg_stream(10)
+
+	for name, framer in [("legacy", LegacyFramer()), ("framer", Framer())]:
+		n, blocks, size, peak = measure(framer, data)
+		print("%-7s %6d packets  %5.2f blocks/packet  %6.1f bytes/packet  peak %6d bytes/chunk" % (name, n, blocks, size, peak))
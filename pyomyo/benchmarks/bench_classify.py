@@ -0,0 +1,98 @@
+'''
+MyoClassifier classifying every EMG sample with cls.classify as it arrives,
+and in batches with cls.classify_batch, collected for a latency budget.
+
+	python benchmarks/bench_classify.py [samples] [rate in Hz]
+
+For each classifier type reports the cost per sample one at a time, then
+for each budget the mean batch size, the cost per sample and the decision
+latency, from a sample's arrival to its vote: waiting for the batch to be
+handed over, as EmgBatcher does it, plus classifying the batch. Arrival
+times are simulated at the Myo's rate, 200 Hz in RAW mode and 50 Hz in the
+FILTERED and PREPROCESSED modes. The models are trained on 10000 samples.
+'''
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import GaussianNB
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+
+from pyomyo.Classifier import Classifier, Live_Classifier
+
+BUDGETS = [0.005, 0.01, 0.02, 0.05]
+
+def samples(rng, n):
+	centres = rng.integers(100, 900, (5, 8))
+	Y = rng.integers(0, 5, n)
+	X = np.clip(centres[Y] + rng.normal(0, 40, (n, 8)), 0, 1023).astype(np.uint16)
+	return X, Y.astype(np.int8)
+
+def classifiers():
+	yield Classifier(name='Classifier (nearest)')
+	yield Live_Classifier(GaussianNB(), name='GaussianNB')
+	yield Live_Classifier(LogisticRegression(max_iter=500), name='LogisticRegression')
+	yield Live_Classifier(DecisionTreeClassifier(), name='DecisionTree')
+	yield Live_Classifier(make_pipeline(StandardScaler(), SVC(gamma='auto')), name='SVC')
+
+def batches(n, rate, budget):
+	'''
+	Splits n samples arriving rate times a second into batches the way
+	EmgBatcher does with latency=budget: a batch is handed over as soon as
+	the next sample would arrive more than budget seconds after its first.
+	Returns (start, end) index pairs.
+	'''
+	out = []
+	start = 0
+	for i in range(n):
+		if (i + 1 - start) / rate > budget or i == n - 1:
+			out.append((start, i + 1))
+			start = i + 1
+	return out
+
+if __name__ == '__main__':
+	n = int(sys.argv[1]) if len(sys.argv) >= 2 else 2000
+	rate = float(sys.argv[2]) if len(sys.argv) >= 3 else 200
+	rng = np.random.default_rng(0)
+	X, Y = samples(rng, 10000)
+	stream, _ = samples(rng, n)
+	rows = [tuple(int(v) for v in d) for d in stream]
+
+	# Classifier reads and writes its training data under data/
+	os.chdir(tempfile.mkdtemp())
+	os.mkdir('data')
+
+	print("%d samples at %.0f Hz" % (n, rate))
+	for cls in classifiers():
+		cls.store.extend(X, Y)
+		cls.train(cls.store.X, cls.store.Y)
+		# Warm up, and wait for the nearest neighbour index
+		cls.classify(rows[0])
+		cls.index.wait()
+
+		start = time.perf_counter()
+		single = [cls.classify(d) for d in rows]
+		one = (time.perf_counter() - start) / n
+		print("%s\n  one at a time   %8.1f us/sample %10.0f samples/s" % (cls.name, one * 1e6, 1 / one))
+
+		for budget in BUDGETS:
+			spans = batches(n, rate, budget)
+			latency = []
+			start = time.perf_counter()
+			for a, b in spans:
+				t = time.perf_counter()
+				ys = cls.classify_batch(stream[a:b])
+				cost = time.perf_counter() - t
+				assert list(ys) == single[a:b]
+				# Sample i arrived (b - 1 - i) / rate before the batch was handed over
+				latency.extend((b - 1 - i) / rate + cost for i in range(a, b))
+			per = (time.perf_counter() - start) / n
+			print("  %2.0f ms budget    %8.1f us/sample %10.0f samples/s, batches of %4.1f, latency mean %5.1f max %5.1f ms" % (
+				budget * 1e3, per * 1e6, 1 / per, n / len(spans), np.mean(latency) * 1e3, np.max(latency) * 1e3))
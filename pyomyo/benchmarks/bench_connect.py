@@ -0,0 +1,68 @@
+'''
+Time from Myo.connect() to the first EMG sample, as the driver reports it
+in Myo.stats(), against the simulated dongle, for a scan and full
+handshake, a reconnect from the device cache, and a cache whose Myo is gone
+(direct connect times out, then scan). The first two are also run with
+commands pipelined, Myo(pipeline=True).
+
+	python benchmarks/bench_connect.py [runs] [connection interval ms] [advertising delay ms]
+
+The defaults are a 7.5 ms connection interval, what Myo.connect asks the
+dongle for, and 100 ms until the Myo advertises.
+'''
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+from pyomyo import Myo, emg_mode
+from pyomyo.sim import SimMyo, SimSerial
+
+OTHER = (1, 2, 3, 4, 5, 6)
+
+def first_sample(sim, cache, direct_timeout=None, pipeline=False):
+	'''Seconds from connect() to the first EMG sample.'''
+	m = Myo(sim, mode=emg_mode.RAW, cache=cache, pipeline=pipeline)
+	if direct_timeout is not None:
+		m.direct_timeout = direct_timeout
+	with contextlib.redirect_stdout(io.StringIO()):
+		m.connect()
+	while m.time_to_first_emg is None:
+		m.run()
+	return m.time_to_first_emg
+
+def median(xs):
+	xs = sorted(xs)
+	return xs[len(xs) // 2]
+
+if __name__ == '__main__':
+	runs = int(sys.argv[1]) if len(sys.argv) >= 2 else 5
+	interval = float(sys.argv[2]) / 1000 if len(sys.argv) >= 3 else 0.0075
+	advertising = float(sys.argv[3]) / 1000 if len(sys.argv) >= 4 else 0.1
+
+	def sim():
+		return SimSerial(SimMyo(), interval=interval, scan_delay=advertising)
+
+	with tempfile.TemporaryDirectory() as d:
+		path = os.path.join(d, 'cache.json')
+		scan = [first_sample(sim(), None) for _ in range(runs)]
+		scan_pipelined = [first_sample(sim(), None, pipeline=True) for _ in range(runs)]
+		# The first run fills the cache
+		first_sample(sim(), path)
+		cached = [first_sample(sim(), path) for _ in range(runs)]
+		cached_pipelined = [first_sample(sim(), path, pipeline=True) for _ in range(runs)]
+		# A cache pointing at a Myo that isn't there
+		stale = []
+		for _ in range(runs):
+			Myo(sim(), cache=path).cache.save(OTHER, (1, 5, 1970, 2), False)
+			stale.append(first_sample(sim(), path, direct_timeout=0.5))
+
+	print("connection interval %.1f ms, advertising delay %.0f ms, median of %d" % (interval * 1000, advertising * 1000, runs))
+	print("scan and handshake:        %7.1f ms" % (median(scan) * 1000))
+	print("  pipelined:               %7.1f ms" % (median(scan_pipelined) * 1000))
+	print("cached reconnect:          %7.1f ms" % (median(cached) * 1000))
+	print("  pipelined:               %7.1f ms" % (median(cached_pipelined) * 1000))
+	print("stale cache (0.5 s), scan: %7.1f ms" % (median(stale) * 1000))
+	print("speedup:                   %7.1fx" % (median(scan) / median(cached_pipelined)))
@@ -0,0 +1,87 @@
+'''
+Cost of decoding one notification, Myo.handle_data's decoder table against
+the if/elif closure it replaced, for each notification type, with the same
+handlers registered for both.
+
+	python benchmarks/bench_decode.py
+
+handle_data also counts notifications for Myo.stats. Sample timestamps
+(SampleClock) are left out, as in a program that doesn't ask for them.
+'''
+
+import struct
+import timeit
+
+from pyomyo import Myo, Framer, Arm, XDirection, Pose
+
+from streams import notification, StreamSerial
+
+def unpack(fmt, *args):
+	return struct.unpack('<' + fmt, *args)
+
+def legacy_handle_data(self):
+	'''The handle_data closure Myo.connect used to register.'''
+	def handle_data(p):
+		if (p.cls, p.cmd) != (4, 5):
+			return
+
+		c, attr, typ = unpack('BHB', p.payload[:4])
+		pay = p.payload[5:]
+
+		if attr == 0x27:
+			vals = unpack('8HB', pay)
+			emg = vals[:8]
+			moving = vals[8]
+			self.on_emg(emg, moving)
+		elif attr == 0x2b or attr == 0x2e or attr == 0x31 or attr == 0x34:
+			emg1 = struct.unpack('<8b', pay[:8])
+			emg2 = struct.unpack('<8b', pay[8:])
+			self.on_emg(emg1, 0)
+			self.on_emg(emg2, 0)
+		elif attr == 0x1c:
+			vals = unpack('10h', pay)
+			quat = vals[:4]
+			acc = vals[4:7]
+			gyro = vals[7:10]
+			self.on_imu(quat, acc, gyro)
+		elif attr == 0x23:
+			typ, val, xdir, _, _, _ = unpack('6B', pay)
+			if typ == 1:
+				self.on_arm(Arm(val), XDirection(xdir))
+			elif typ == 2:
+				self.on_arm(Arm.UNKNOWN, XDirection.UNKNOWN)
+			elif typ == 3:
+				self.on_pose(Pose(val))
+		elif attr == 0x11:
+			battery_level = pay[0]
+			self.on_battery(battery_level)
+		else:
+			print('data with unknown attr: %02X %s' % (attr, p))
+	return handle_data
+
+PACKETS = {
+	'emg raw (0x2b)': notification(0x2b, struct.pack('<16b', *range(-8, 8))),
+	'emg filtered (0x27)': notification(0x27, struct.pack('<8HB', *range(100, 108), 0)),
+	'imu (0x1c)': notification(0x1c, struct.pack('<10h', *range(10))),
+	'pose (0x23)': notification(0x23, struct.pack('<6B', 3, 1, 0, 0, 0, 0)),
+	'battery (0x11)': notification(0x11, b'\x64'),
+}
+
+if __name__ == '__main__':
+	m = Myo(StreamSerial(b''))
+	# As if connected, the packets are on connection 0, or handle_data returns straight away
+	m.conn = 0
+	# The same handlers for both, the table skips decoding what nobody listens to
+	m.add_emg_handler(lambda emg, moving: None)
+	m.add_imu_handler(lambda quat, acc, gyro: None)
+	m.add_arm_handler(lambda arm, xdir: None)
+	m.add_pose_handler(lambda pose: None)
+	m.add_battery_handler(lambda battery_level: None)
+	legacy = legacy_handle_data(m)
+	n = 200000
+	print("%-20s %12s %12s" % ("notification", "closure ns", "table ns"))
+	for name, data in PACKETS.items():
+		p = Framer().feed(data)[0]
+		old = min(timeit.repeat(lambda: legacy(p), number=n, repeat=5)) / n * 1e9
+		new = min(timeit.repeat(lambda: m.handle_data(p), number=n, repeat=5)) / n * 1e9
+		print("%-20s %12.0f %12.0f" % (name, old, new))
@@ -0,0 +1,181 @@
+'''
+Throughput and latency of the driver's hot paths, without hardware.
+
+	python benchmarks/bench_driver.py [--label NAME] [--output FILE] [--compare NAME]
+
+Every case reports the p50 and p99 cost of one operation and the memory it
+allocates, measured with tracemalloc. Results are stored in FILE (by default
+benchmarks/results.json) under NAME (by default the pyomyo version), so the
+driver can be compared release over release with --compare.
+'''
+
+import argparse
+import json
+import os
+import platform
+import struct
+import time
+import tracemalloc
+
+from pyomyo import BT, Framer, Myo, Packet
+
+from streams import notification, raw_emg_stream, StreamSerial
+
+RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results.json')
+
+def version():
+	try:
+		from importlib.metadata import version
+		return version('pyomyo')
+	except Exception:
+		return 'dev'
+
+def measure(op, per_call=1, batch=200, batches=200):
+	'''
+	Times op in batches, returns per operation p50 and p99 in ns, and the
+	bytes allocated (peak) and kept (net) per operation.
+	per_call is how many operations one call of op performs.
+	'''
+	for _ in range(batch):
+		op()
+	times = []
+	for _ in range(batches):
+		start = time.perf_counter_ns()
+		for _ in range(batch):
+			op()
+		times.append((time.perf_counter_ns() - start) / (batch * per_call))
+	times.sort()
+
+	tracemalloc.start()
+	before, _ = tracemalloc.get_traced_memory()
+	tracemalloc.reset_peak()
+	for _ in range(batch):
+		op()
+	after, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	return {
+		'p50_ns': times[len(times) // 2],
+		'p99_ns': times[min(len(times) - 1, int(len(times) * 0.99))],
+		'peak_bytes': (peak - before) / (batch * per_call),
+		'net_bytes': (after - before) / (batch * per_call),
+	}
+
+def connected_myo(data=b''):
+	'''A Myo that reads data and decodes notifications as if connect() had run.'''
+	m = Myo(StreamSerial(data, chunk=256))
+	m.conn = 0
+	m.bt.add_handler(m.handle_data)
+	return m
+
+def framing_cases(stream):
+	cases = {}
+	n_packets = len(Framer().feed(stream))
+	chunks = [stream[i:i + 256] for i in range(0, len(stream), 256)]
+
+	def framer():
+		f = Framer()
+		for c in chunks:
+			f.feed(c)
+	cases['framer.feed'] = measure(framer, per_call=n_packets, batch=1, batches=50)
+
+	def proc_byte():
+		bt = BT(StreamSerial(b''), bulk=False)
+		for c in stream:
+			bt.proc_byte(c)
+	cases['BT.proc_byte'] = measure(proc_byte, per_call=n_packets, batch=1, batches=10)
+	return cases
+
+def packet_cases():
+	raw = notification(0x2b, bytes(16))
+	view = memoryview(bytearray(raw))
+	ords = list(raw)
+	return {
+		'Packet(memoryview)': measure(lambda: Packet(view)),
+		'Packet(list)': measure(lambda: Packet(ords)),
+	}
+
+def decode_cases():
+	packets = {
+		'emg raw': notification(0x2b, struct.pack('<16b', *range(-8, 8))),
+		'emg filtered': notification(0x27, struct.pack('<8HB', *range(100, 108), 0)),
+		'imu': notification(0x1c, struct.pack('<10h', *range(10))),
+		'pose': notification(0x23, struct.pack('<6B', 3, 1, 0, 0, 0, 0)),
+		'battery': notification(0x11, b'\x64'),
+	}
+	cases = {}
+	m = connected_myo()
+	m.add_emg_handler(lambda emg, moving: None)
+	m.add_imu_handler(lambda quat, acc, gyro: None)
+	m.add_pose_handler(lambda p: None)
+	m.add_battery_handler(lambda b: None)
+	for name, data in packets.items():
+		p = Framer().feed(data)[0]
+		cases['handle_data %s' % name] = measure(lambda: m.handle_data(p))
+	return cases
+
+def dispatch_cases():
+	cases = {}
+	p = Framer().feed(notification(0x2b, bytes(16)))[0]
+	for n in [0, 1, 8]:
+		m = connected_myo()
+		for _ in range(n):
+			m.add_emg_handler(lambda emg, moving: None)
+		# Two samples per notification
+		cases['dispatch %d handlers' % n] = measure(lambda: m.handle_data(p), per_call=2)
+	return cases
+
+def end_to_end_cases(stream):
+	n_packets = len(Framer().feed(stream))
+
+	def run():
+		m = connected_myo(stream)
+		m.add_emg_handler(lambda emg, moving: None)
+		m.add_imu_handler(lambda quat, acc, gyro: None)
+		for _ in range(n_packets):
+			m.run()
+	case = measure(run, per_call=n_packets, batch=1, batches=20)
+	case['packets_per_s'] = 1e9 / case['p50_ns']
+	return {'Myo.run end to end': case}
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--label', default=version())
+	parser.add_argument('--output', default=RESULTS)
+	parser.add_argument('--compare', help='label of earlier results to compare against')
+	parser.add_argument('--seconds', type=int, default=5, help='seconds of RAW EMG + IMU to stream')
+	args = parser.parse_args()
+
+	stream = raw_emg_stream(args.seconds)
+	cases = {}
+	cases.update(framing_cases(stream))
+	cases.update(packet_cases())
+	cases.update(decode_cases())
+	cases.update(dispatch_cases())
+	cases.update(end_to_end_cases(stream))
+
+	results = {}
+	if os.path.exists(args.output):
+		with open(args.output) as f:
+			results = json.load(f)
+	old = results.get(args.compare, {}).get('cases', {}) if args.compare else {}
+
+	print("%-28s %10s %10s %10s %10s %8s" % ("case", "p50 ns", "p99 ns", "peak B", "net B", "vs old"))
+	for name, c in cases.items():
+		ratio = ''
+		if name in old:
+			ratio = '%.2fx' % (old[name]['p50_ns'] / c['p50_ns'])
+		print("%-28s %10.0f %10.0f %10.1f %10.1f %8s" % (name, c['p50_ns'], c['p99_ns'], c['peak_bytes'], c['net_bytes'], ratio))
+
+	results[args.label] = {
+		'python': platform.python_version(),
+		'machine': platform.machine(),
+		'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+		'cases': cases,
+	}
+	with open(args.output, 'w') as f:
+		json.dump(results, f, indent=1, sort_keys=True)
+	print("Saved as '%s' in %s" % (args.label, args.output))
+
+if __name__ == '__main__':
+	main()
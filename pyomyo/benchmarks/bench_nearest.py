@@ -0,0 +1,67 @@
+'''
+Classifier.nearest, the per sample prediction of the default classifier,
+with a brute force search over every stored sample, as it used to be, and
+with NearestIndex, a KD-tree plus a brute force search of the samples added
+since the tree was built.
+
+	python benchmarks/bench_nearest.py [queries]
+
+Samples are clustered around one centre per label, like recorded poses.
+Reports the microseconds per query at 1k to 1M stored samples, with no tail
+and with the longest tail before a rebuild, and how long a rebuild takes.
+'''
+
+import sys
+import time
+
+import numpy as np
+
+from pyomyo.Classifier import NearestIndex, cKDTree
+
+SIZES = [1000, 10000, 100000, 1000000]
+
+def samples(rng, n):
+	centres = rng.integers(100, 900, (10, 8))
+	Y = rng.integers(0, 10, n)
+	X = np.clip(centres[Y] + rng.normal(0, 40, (n, 8)), 0, 1023).astype(np.uint16)
+	return X, Y.astype(np.int8)
+
+def brute(X, d):
+	diff = np.subtract(X, d, dtype=np.int64)
+	return (diff**2).sum(1).argmin()
+
+def per_query(f, queries):
+	start = time.perf_counter()
+	for d in queries:
+		f(d)
+	return (time.perf_counter() - start) / len(queries) * 1e6
+
+if __name__ == '__main__':
+	n_queries = int(sys.argv[1]) if len(sys.argv) >= 2 else 200
+	rng = np.random.default_rng(0)
+	if cKDTree is None:
+		print("scipy isn't installed, NearestIndex searches by brute force too")
+
+	print("%10s %12s %12s %12s %10s" % ('samples', 'brute us', 'index us', '+tail us', 'build ms'))
+	for n in SIZES:
+		X, _ = samples(rng, n)
+		queries, _ = samples(rng, n_queries)
+		queries = [tuple(int(v) for v in d) for d in queries]
+
+		index = NearestIndex(background=False)
+		start = time.perf_counter()
+		index.query(X, queries[0])
+		build = (time.perf_counter() - start) * 1e3
+
+		# Same answers, up to ties
+		for d in queries[:20]:
+			a, b = brute(X, d), index.query(X, d)
+			diff = np.subtract(X[[a, b]], d, dtype=np.int64)
+			assert (diff[0]**2).sum() == (diff[1]**2).sum()
+
+		old = per_query(lambda d: brute(X, d), queries)
+		new = per_query(lambda d: index.query(X, d), queries)
+		# Samples stored since the build, just short of a rebuild
+		grown = np.concatenate([X, samples(rng, index.max_tail)[0]])
+		tail = per_query(lambda d: index.query(grown, d), queries)
+		print("%10d %12.1f %12.1f %12.1f %10.1f" % (n, old, new, tail, build))
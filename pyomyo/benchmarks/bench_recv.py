@@ -0,0 +1,38 @@
+'''
+Packets per second through BT.recv_packet, reading one byte per call
+(bulk=False) against draining the port in chunks (bulk=True).
+
+	python benchmarks/bench_recv.py [seconds of stream] [chunk size]
+'''
+
+import sys
+import time
+
+from pyomyo import BT
+
+from streams import raw_emg_stream, StreamSerial
+
+def run(data, bulk, chunk):
+	bt = BT(StreamSerial(data, chunk), bulk=bulk)
+	packets = []
+	start = time.perf_counter()
+	while True:
+		p = bt.recv_packet()
+		if p is None:
+			break
+		packets.append((p.typ, p.cls, p.cmd, bytes(p.payload)))
+	return packets, time.perf_counter() - start
+
+if __name__ == '__main__':
+	seconds = int(sys.argv[1]) if len(sys.argv) >= 2 else 60
+	chunk = int(sys.argv[2]) if len(sys.argv) >= 3 else 256
+	data = raw_emg_stream(seconds)
+	print("%d bytes, %d seconds of RAW EMG + IMU, chunk %d" % (len(data), seconds, chunk))
+
+	byte_pkts, byte_t = run(data, False, chunk)
+	bulk_pkts, bulk_t = run(data, True, chunk)
+	assert byte_pkts == bulk_pkts, "bulk reads framed different packets"
+
+	print("bytewise: %10.0f packets/s" % (len(byte_pkts) / byte_t))
+	print("bulk:     %10.0f packets/s" % (len(bulk_pkts) / bulk_t))
+	print("speedup:  %10.1fx" % (byte_t / bulk_t))
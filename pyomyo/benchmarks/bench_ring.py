@@ -0,0 +1,110 @@
+'''
+Passing EMG from the process that owns the Myo to another one, through a
+multiprocessing.Queue, one put per sample as the examples used to, and
+through a SharedRing, one write per notification.
+
+	python benchmarks/bench_ring.py [samples] [seconds at 200 Hz]
+
+Reports how many samples per second each gets across, and the CPU time the
+consumer spends at the Myo's real 200 Hz: polling q.empty() in a loop, as
+the examples did, blocking in q.get(), and waiting in RingCursor.next().
+'''
+
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from pyomyo.ring import SharedRing
+
+NAME = 'pyomyo_bench_%d' % os.getpid()
+SAMPLE = [1, -2, 3, -4, 5, -6, 7, -8]
+
+# Producers, two samples per notification like the Myo sends them
+def queue_producer(q, n, period):
+	for i in range(0, n, 2):
+		q.put(SAMPLE)
+		q.put(SAMPLE)
+		if period:
+			time.sleep(period)
+	q.put(None)
+
+def ring_producer(name, n, period):
+	ring = SharedRing.attach(name, writer=True)
+	pair = np.array([SAMPLE, SAMPLE], dtype=np.int8)
+	for i in range(0, n, 2):
+		ring.write(pair)
+		if period:
+			time.sleep(period)
+	ring.close()
+
+# Consumers, return (samples, seconds, CPU seconds)
+def queue_polling(q, n):
+	got = 0
+	start, cpu = time.perf_counter(), time.process_time()
+	while got < n:
+		while not q.empty():
+			if q.get() is not None:
+				got += 1
+	return got, time.perf_counter() - start, time.process_time() - cpu
+
+def queue_blocking(q, n):
+	got = 0
+	start, cpu = time.perf_counter(), time.process_time()
+	while q.get() is not None:
+		got += 1
+	return got, time.perf_counter() - start, time.process_time() - cpu
+
+def ring_cursor(ring, n):
+	cursor = ring.cursor(0)
+	got = 0
+	start, cpu = time.perf_counter(), time.process_time()
+	while cursor.seq < n:
+		got += len(cursor.next(timeout=1.0))
+	return got, time.perf_counter() - start, time.process_time() - cpu
+
+def run_queue(consumer, n, period):
+	q = multiprocessing.Queue()
+	p = multiprocessing.Process(target=queue_producer, args=(q, n, period))
+	p.start()
+	result = consumer(q, n)
+	p.join()
+	return result
+
+def run_ring(n, period):
+	ring = SharedRing.create(NAME, max(n, 2), 8, np.int8)
+	try:
+		p = multiprocessing.Process(target=ring_producer, args=(NAME, n, period))
+		p.start()
+		result = ring_cursor(ring, n)
+		p.join()
+	finally:
+		ring.close()
+		ring.unlink()
+	return result
+
+if __name__ == '__main__':
+	n = int(sys.argv[1]) if len(sys.argv) >= 2 else 200000
+	seconds = float(sys.argv[2]) if len(sys.argv) >= 3 else 5
+
+	print("throughput, %d samples" % n)
+	for label, run in [
+		('Queue, polling', lambda: run_queue(queue_polling, n, 0)),
+		('Queue, get()', lambda: run_queue(queue_blocking, n, 0)),
+		('SharedRing cursor', lambda: run_ring(n, 0)),
+	]:
+		got, wall, cpu = run()
+		print("  %-20s %10.0f samples/s %8.2f us/sample" % (label, got / wall, wall / got * 1e6))
+
+	# 100 notifications of 2 samples a second
+	live = int(seconds * 200)
+	print("consumer CPU at 200 Hz, %.0f s" % seconds)
+	for label, run in [
+		('Queue, polling', lambda: run_queue(queue_polling, live, 0.01)),
+		('Queue, get()', lambda: run_queue(queue_blocking, live, 0.01)),
+		('SharedRing cursor', lambda: run_ring(live, 0.01)),
+	]:
+		got, wall, cpu = run()
+		print("  %-20s %6.1f%% of a core, %d samples" % (label, cpu / wall * 100, got))
@@ -0,0 +1,88 @@
+'''
+Classifier's training data on disk, as ten data/valsN.dat files opened and
+closed for every labelled sample and read back with np.fromfile, and as one
+SampleFile, buffered and mapped with np.memmap.
+
+	python benchmarks/bench_store.py [samples to label] [samples to load]
+
+Reports the cost of storing one sample, of loading everything stored, both
+just mapping it and handing it to a SampleStore as Classifier.read_data
+does, of finding the samples of one label, and of counting the samples of
+every label as Classifier.run_gui does every frame.
+'''
+
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from pyomyo.Classifier import SampleStore
+from pyomyo.datafile import SampleFile
+
+def old_store(folder, cls, vals):
+	with open(os.path.join(folder, 'vals%d.dat' % cls), 'ab') as f:
+		f.write(struct.pack('<8H', *vals))
+
+def old_load(folder):
+	store = SampleStore()
+	for i in range(10):
+		X = np.fromfile(os.path.join(folder, 'vals%d.dat' % i), dtype=np.uint16).reshape((-1, 8))
+		store.extend(X, i)
+	return store
+
+def new_load(f, store):
+	f.load()
+	if store:
+		SampleStore().load(f.data['emg'], f.data['label'])
+
+def timed(fn, repeat=5):
+	best = float('inf')
+	for _ in range(repeat):
+		start = time.perf_counter()
+		fn()
+		best = min(best, time.perf_counter() - start)
+	return best
+
+if __name__ == '__main__':
+	n_store = int(sys.argv[1]) if len(sys.argv) >= 2 else 20000
+	n_load = int(sys.argv[2]) if len(sys.argv) >= 3 else 1000000
+	rng = np.random.default_rng(0)
+	folder = tempfile.mkdtemp()
+	rows = [tuple(int(v) for v in d) for d in rng.integers(0, 1024, (n_store, 8))]
+	labels = rng.integers(0, 10, n_store)
+
+	print("storing %d samples, one at a time" % n_store)
+	start = time.perf_counter()
+	for cls, vals in zip(labels, rows):
+		old_store(folder, cls, vals)
+	print("  %-24s %8.2f us/sample" % ('valsN.dat', (time.perf_counter() - start) / n_store * 1e6))
+	f = SampleFile(os.path.join(folder, 'samples.dat'))
+	start = time.perf_counter()
+	for cls, vals in zip(labels, rows):
+		f.append(cls, vals)
+	f.flush()
+	print("  %-24s %8.2f us/sample" % ('SampleFile', (time.perf_counter() - start) / n_store * 1e6))
+
+	# A bigger set to load, written in one go
+	X = rng.integers(0, 1024, (n_load, 8)).astype(np.uint16)
+	Y = rng.integers(0, 10, n_load)
+	for i in range(10):
+		X[Y == i].tofile(os.path.join(folder, 'vals%d.dat' % i))
+	f.clear()
+	f.extend(Y, X)
+
+	print("loading %d samples" % n_load)
+	print("  %-24s %8.1f ms" % ('valsN.dat, fromfile', timed(lambda: old_load(folder)) * 1e3))
+	print("  %-24s %8.1f ms" % ('SampleFile, memmap', timed(lambda: new_load(f, False)) * 1e3))
+	print("  %-24s %8.1f ms" % ('SampleFile, into store', timed(lambda: new_load(f, True)) * 1e3))
+	print("  %-24s %8.1f ms" % ('index every label', timed(lambda: (f.load(), f.offsets(3))) * 1e3))
+	print("  %-24s %8.1f ms" % ('a label, indexed', timed(lambda: f.data['emg'][f.offsets(3)]) * 1e3))
+	print("  %-24s %8.1f ms" % ('a label, by scanning', timed(lambda: f.data['emg'][f.data['label'] == 3]) * 1e3))
+	print("  %-24s %8.1f ms" % ('count labels, indexed', timed(lambda: [f.label_count(i) for i in range(10)]) * 1e3))
+	print("  %-24s %8.1f ms" % ('count labels, scanning', timed(lambda: [(f.data['label'] == i).sum() for i in range(10)]) * 1e3))
+	f.close()
+	shutil.rmtree(folder)
@@ -0,0 +1,61 @@
+'''
+Synthetic BLED112 byte streams used by the benchmarks, so they can run
+without a dongle or a Myo.
+'''
+
+import random
+import struct
+
+# The four raw EMG characteristics, in the order the Myo sends them
+EMG_ATTRS = (0x2b, 0x2e, 0x31, 0x34)
+
+def event(cls, cmd, payload):
+	'''Encode a BLED112 event packet.'''
+	return struct.pack('<4B', 0x80 | (len(payload) >> 8), len(payload) & 0xff, cls, cmd) + payload
+
+def notification(attr, value, conn=0):
+	'''Encode an attribute value event (4, 5), as used for Myo notifications.'''
+	return event(4, 5, struct.pack('<BHBB', conn, attr, 1, len(value)) + value)
+
+def raw_emg_stream(seconds=10, imu=True, seed=0):
+	'''
+	Bytes the dongle sends in seconds of RAW mode streaming: 200Hz EMG,
+	two samples per notification, plus 50Hz IMU if imu is True.
+	'''
+	rnd = random.Random(seed)
+	out = bytearray()
+	for i in range(seconds * 100):
+		emg = struct.pack('<16b', *[rnd.randint(-128, 127) for _ in range(16)])
+		out += notification(EMG_ATTRS[i % 4], emg)
+		if imu and i % 2 == 0:
+			vals = [rnd.randint(-2000, 2000) for _ in range(10)]
+			out += notification(0x1c, struct.pack('<10h', *vals))
+	return bytes(out)
+
+class StreamSerial(object):
+	'''
+	Serial-like object replaying a fixed byte stream.
+	At most chunk bytes are reported as waiting at once, which mimics a reader
+	that keeps up with the device.
+	'''
+
+	def __init__(self, data, chunk=256):
+		self.data = data
+		self.chunk = chunk
+		self.pos = 0
+
+	def inWaiting(self):
+		return min(self.chunk, len(self.data) - self.pos)
+
+	in_waiting = property(inWaiting)
+
+	def read(self, size=1):
+		ret = self.data[self.pos:self.pos + size]
+		self.pos += len(ret)
+		return ret
+
+	def write(self, data):
+		return len(data)
+
+	def flushInput(self):
+		self.pos = len(self.data)
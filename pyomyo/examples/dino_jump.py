@@ -6,8 +6,8 @@ Instructions:
 3. Relax the Myo arm, and with your other hand press 0 - This labels the incoming data as class 0
 4. Make a fist with your hand and press 1, to label the fist as 1.
 5. Try making a closed and open fist and watching the bars change.
-6. Once you've gathered enough data, exit the pygame window. This saves the data in data/vals0.dat and vals1.dat
-7. If you make a mistake and wrongly classify data, delete vals0 and vals1 and regather
+6. Once you've gathered enough data, exit the pygame window. This saves the data in data/samples.dat
+7. If you make a mistake and wrongly classify data, press e to delete the data and regather
 8. If your happy it works, change TRAINING_MODE to False.
 9. Goto https://trex-runner.com/ and rerun dino_jump.py with TRAINING_MODE set to false.
 10. Click in the brower to start the game and tell windows to send keypresses there
@@ -72,5 +72,6 @@ if __name__ == '__main__':
 		pass
 	finally:
 		m.disconnect()
+		m.cls.flush_data()
 		print()
 		pygame.quit()
\ No newline at end of file
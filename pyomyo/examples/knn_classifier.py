@@ -59,6 +59,12 @@ class KNN_Classifier(Classifier):
 		pred = self.model.predict(x)
 		return int(pred[0])
 
+	def classify_batch(self, X):
+		if self.X.shape[0] < K * SUBSAMPLE: 
+			return np.zeros(len(X), dtype=int)
+
+		return self.model.predict(X).astype(int)
+
 def text(scr, font, txt, pos, clr=(255,255,255)):
 	scr.blit(font.render(txt, True, clr), pos)
 
@@ -98,6 +104,7 @@ if __name__ == '__main__':
 				elif ev.type == KEYUP:
 					if K_0 <= ev.key <= K_9 or K_KP0 <= ev.key <= K_KP9:
 						hnd.recording = -1
+						m.cls.flush_data()
 
 			# Plotting
 			scr.fill((0, 0, 0), (0, 0, w, h))
@@ -108,7 +115,7 @@ if __name__ == '__main__':
 
 				clr = (0,200,0) if i == r else (255,255,255)
 
-				txt = font.render('%5d' % (m.cls.Y == i).sum(), True, (255,255,255))
+				txt = font.render('%5d' % m.cls.file.label_count(i), True, (255,255,255))
 				scr.blit(txt, (x + 20, y))
 
 				txt = font.render('%d' % i, True, clr)
@@ -134,5 +141,6 @@ if __name__ == '__main__':
 		pass
 	finally:
 		m.disconnect()
+		m.cls.flush_data()
 		print()
 		pygame.quit()
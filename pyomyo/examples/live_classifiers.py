@@ -104,6 +104,10 @@ if __name__ == '__main__':
 	# Live classifier example
 	#model = GaussianNB()
 	#m = MyoClassifier(Live_Classifier(model, name="NB", color=(255,165,50)))
+	# Refit on a background thread every half a second instead of on every sample
+	#m = MyoClassifier(Live_Classifier(model, name="NB", color=(255,165,50), background=True))
+	# Classify the samples of the last 10 ms in one predict call instead of one call each
+	#m = MyoClassifier(Live_Classifier(model, name="NB", color=(255,165,50)), latency=0.01)
 
 	hnd = EMGHandler(m)
 	m.add_emg_handler(hnd)
@@ -126,5 +130,6 @@ if __name__ == '__main__':
 		pass
 	finally:
 		m.disconnect()
+		m.cls.flush_data()
 		print()
 		pygame.quit()
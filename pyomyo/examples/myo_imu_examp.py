@@ -1,5 +1,5 @@
-import multiprocessing
-from pyomyo import Myo, emg_mode
+from pyomyo import emg_mode
+from pyomyo.hub import MyoHub
 import os
 
 def cls():
@@ -8,38 +8,25 @@ def cls():
     os.system('cls' if os.name=='nt' else 'clear')
 
 # ------------ Myo Setup ---------------
-q = multiprocessing.Queue()
-
-def worker(q):
-	m = Myo(mode=emg_mode.FILTERED)
-	m.connect()
-	
-	def add_to_queue(quat, acc, gyro):
-		imu_data = [quat, acc, gyro]
-		q.put(imu_data)
-
-	m.add_imu_handler(add_to_queue)
-	
+def setup(m):
+	# Runs in the hub's process, once the Myo is connected
 	# Orange logo and bar LEDs
 	m.set_leds([128, 128, 0], [128, 128, 0])
 	# Vibrate to know we connected okay
 	m.vibrate(1)
-	
-	"""worker function"""
-	while True:
-		m.run()
-	print("Worker Stopped")
 
 # -------- Main Program Loop -----------
 if __name__ == "__main__":
-	p = multiprocessing.Process(target=worker, args=(q,))
-	p.start()
+	# The Myo is read in its own process, samples come through shared memory
+	hub = MyoHub(mode=emg_mode.FILTERED, setup=setup)
+	hub.start()
+	cursor = hub.imu.cursor()
 
 	try:
 		while True:
-			while not(q.empty()):
-				imu = list(q.get())
-				quat, acc, gyro = imu
+			# Sleeps until there are new samples
+			for imu in cursor.next(timeout=1.0):
+				quat, acc, gyro = list(imu[:4]), list(imu[4:7]), list(imu[7:])
 				print("Quaternions:", quat)
 				print("Acceleration:", acc)
 				print("Gyroscope:", gyro)
@@ -47,4 +34,5 @@ if __name__ == "__main__":
 
 	except KeyboardInterrupt:
 		print("Quitting")
+		hub.stop()
 		quit()
\ No newline at end of file
@@ -1,18 +1,9 @@
-import multiprocessing
-from pyomyo import Myo, emg_mode
+from pyomyo import emg_mode
+from pyomyo.hub import MyoHub
 
 # ------------ Myo Setup ---------------
-q = multiprocessing.Queue()
-
-def worker(q):
-	m = Myo(mode=emg_mode.FILTERED)
-	m.connect()
-	
-	def add_to_queue(emg, movement):
-		q.put(emg)
-
-	m.add_emg_handler(add_to_queue)
-	
+def setup(m):
+	# Runs in the hub's process, once the Myo is connected
 	def print_battery(bat):
 		print("Battery level:", bat)
 
@@ -22,23 +13,22 @@ def worker(q):
 	m.set_leds([128, 0, 0], [128, 0, 0])
 	# Vibrate to know we connected okay
 	m.vibrate(1)
-	
-	"""worker function"""
-	while True:
-		m.run()
-	print("Worker Stopped")
 
 # -------- Main Program Loop -----------
 if __name__ == "__main__":
-	p = multiprocessing.Process(target=worker, args=(q,))
-	p.start()
+	# The Myo is read in its own process, samples come through shared memory
+	hub = MyoHub(mode=emg_mode.FILTERED, setup=setup)
+	hub.start()
+	# Any other process could SharedRing.attach('pyomyo_emg') instead
+	cursor = hub.emg.cursor()
 
 	try:
 		while True:
-			while not(q.empty()):
-				emg = list(q.get())
-				print(emg)
+			# Sleeps until there are new samples
+			for emg in cursor.next(timeout=1.0):
+				print(list(emg))
 
 	except KeyboardInterrupt:
 		print("Quitting")
+		hub.stop()
 		quit()
\ No newline at end of file
@@ -1,26 +1,17 @@
-import multiprocessing
-import queue
-import numpy as np
 import mpl_toolkits.mplot3d as plt3d
 from mpl_toolkits.mplot3d import Axes3D
 import matplotlib.pyplot as plt
 from matplotlib import animation
 from matplotlib.cm import get_cmap
 
-from pyomyo import Myo, emg_mode
+from pyomyo import emg_mode
+from pyomyo.hub import MyoHub
 
 print("Press ctrl+pause/break to stop")
 
 # ------------ Myo Setup ---------------
-q = multiprocessing.Queue()
-
-def worker(q):
-	m = Myo(mode=emg_mode.PREPROCESSED)
-	m.connect()
-	
-	def add_to_queue(emg, movement):
-		q.put(emg)
-
+def setup(m):
+	# Runs in the hub's process, once the Myo is connected
 	def print_battery(bat):
 			print("Battery level:", bat)
 
@@ -29,15 +20,8 @@ def worker(q):
 	# Vibrate to know we connected okay
 	m.vibrate(1)
 	m.add_battery_handler(print_battery)
-	m.add_emg_handler(add_to_queue)
 
-	"""worker function"""
-	while True:
-		try:
-			m.run()
-		except:
-			print("Worker Stopped")
-			quit()
+hub = None
 
 # ------------ Plot Setup ---------------
 QUEUE_SIZE = 100
@@ -60,19 +44,11 @@ for i in range(0,SENSORS):
 	ch_line,  = subplots[i].plot(range(QUEUE_SIZE),[0]*(QUEUE_SIZE), color=colors[i])
 	lines.append(ch_line)
 
-emg_queue = queue.Queue(QUEUE_SIZE)
-
 def animate(i):
-	# Myo Plot
-	while not(q.empty()):
-		myox = list(q.get())
-		if (emg_queue.full()):
-			emg_queue.get()
-		emg_queue.put(myox)
-
-	channels = np.array(emg_queue.queue)
+	# Myo Plot, the last QUEUE_SIZE samples straight from shared memory
+	channels = hub.emg.latest(QUEUE_SIZE)
 
-	if (emg_queue.full()):
+	if (len(channels) == QUEUE_SIZE):
 		for i in range(0,SENSORS):
 			channel = channels[:,i]
 			lines[i].set_ydata(channel)
@@ -80,15 +56,14 @@ def animate(i):
 
 if __name__ == '__main__':
 	# Start Myo Process
-	p = multiprocessing.Process(target=worker, args=(q,))
-	p.start()
+	hub = MyoHub(mode=emg_mode.PREPROCESSED, setup=setup)
+	hub.start()
 
-	while(q.empty()):
-		# Wait until we actually get data
-		continue
+	# Wait until we actually get data
+	hub.emg.wait(0)
 	anim = animation.FuncAnimation(fig, animate, blit=False, interval=2)
 	def on_close(event):
-		p.terminate()
+		hub.stop()
 		raise KeyboardInterrupt
 		print("On close has ran")
 	fig.canvas.mpl_connect('close_event', on_close)
@@ -97,5 +72,4 @@ if __name__ == '__main__':
 		plt.show()
 	except KeyboardInterrupt:
 		plt.close()
-		p.close()
 		quit()
\ No newline at end of file
@@ -1,20 +1,16 @@
 import time
 import sys
-import multiprocessing
-from pyomyo import Myo, emg_mode
-
-def _conexion_worker():
-    m = Myo(mode=emg_mode.PREPROCESSED)
-    m.connect()
-    m.disconnect()
+from pyomyo import Myo, emg_mode, BTTimeoutError
 
 def intentar_conectar(timeout=10):
-    p = multiprocessing.Process(target=_conexion_worker)
-    p.start()
-    p.join(timeout=timeout)
-
-    if p.is_alive():
-        p.terminate()
-        p.join()
+    m = None
+    try:
+        m = Myo(mode=emg_mode.PREPROCESSED)
+        m.connect(timeout=timeout)
+        m.disconnect()
+        return True
+    except BTTimeoutError:
         return False
-    return True
+    finally:
+        if m:
+            m.close()
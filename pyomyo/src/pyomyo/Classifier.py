@@ -22,50 +22,229 @@ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 '''
 
 from collections import Counter, deque
+import copy
+import os
 import struct
 import sys
+import threading
 import time
 
 import pygame
 from pygame.locals import *
 import numpy as np
+try:
+	from scipy.spatial import cKDTree
+except ImportError:
+	# Nearest neighbours are then searched by brute force
+	cKDTree = None
 
 from pyomyo import Myo, emg_mode
+from pyomyo.datafile import SampleFile, migrate_dat
 
 SUBSAMPLE = 3
 K = 15
 
+# Where Classifier keeps its training data
+SAMPLES = 'data/samples.dat'
+
+class SampleStore(object):
+	'''
+	Labelled samples in arrays that double in size when full, so adding one
+	costs O(1) amortised instead of copying everything stored so far.
+	X and Y are views of the samples stored so far, not copies. Stored rows
+	are never written again, so a view stays valid as more are added.
+	load() takes arrays to use as they are, views of a SampleFile's map say,
+	they are only copied once a sample is added.
+	'''
+
+	def __init__(self, width=8, capacity=1024, dtype=np.uint16, label_dtype=np.int16):
+		self.capacity = capacity
+		self.x = np.empty((capacity, width), dtype=dtype)
+		self.y = np.empty(capacity, dtype=label_dtype)
+		self.n = 0
+		# False while x and y are arrays given to load, not ours to write to
+		self.owned = True
+
+	def __len__(self):
+		return self.n
+
+	@property
+	def X(self):
+		return self.x[:self.n]
+
+	@property
+	def Y(self):
+		return self.y[:self.n]
+
+	def reserve(self, n):
+		'''Makes room for n samples in all.'''
+		capacity = len(self.x)
+		if n <= capacity and self.owned:
+			return
+		capacity = max(capacity, self.capacity)
+		while capacity < n:
+			capacity *= 2
+		x = np.empty((capacity, self.x.shape[1]), dtype=self.x.dtype)
+		y = np.empty(capacity, dtype=self.y.dtype)
+		x[:self.n] = self.x[:self.n]
+		y[:self.n] = self.y[:self.n]
+		self.x = x
+		self.y = y
+		self.owned = True
+
+	def load(self, X, Y):
+		'''Makes X and Y the samples stored, without copying them.'''
+		self.x = X
+		self.y = Y
+		self.n = len(X)
+		self.owned = False
+
+	def append(self, cls, vals):
+		self.reserve(self.n + 1)
+		self.x[self.n] = vals
+		self.y[self.n] = cls
+		self.n += 1
+
+	def extend(self, X, Y):
+		n = len(X)
+		self.reserve(self.n + n)
+		self.x[self.n:self.n + n] = X
+		self.y[self.n:self.n + n] = Y
+		self.n += n
+
+	def clear(self):
+		# New arrays, views handed out before keep their rows
+		self.x = np.empty((self.capacity, self.x.shape[1]), dtype=self.x.dtype)
+		self.y = np.empty(self.capacity, dtype=self.y.dtype)
+		self.n = 0
+		self.owned = True
+
+class NearestIndex(object):
+	'''
+	Nearest neighbour search over a growing set of samples.
+
+	A KD-tree (scipy's cKDTree) covers the samples there were when it was
+	built, those added since, the tail, are searched by brute force. Once
+	the tail is longer than max_tail the tree is rebuilt, on a background
+	thread unless background is False, and swapped in when done. Without
+	scipy everything is searched by brute force.
+	Distances are computed in signed arithmetic, uint16 samples don't wrap.
+	'''
+
+	def __init__(self, max_tail=2048, background=True):
+		self.max_tail = max_tail
+		self.background = background
+		# (tree, number of samples it covers), replaced as a whole
+		self.tree = (None, 0)
+		self.lock = threading.Lock()
+		# Bumped by clear, a tree built from older samples is thrown away
+		self.generation = 0
+		self.building = False
+
+	def clear(self):
+		'''Forgets the tree, for when the samples are replaced rather than added to.'''
+		with self.lock:
+			self.generation += 1
+			self.tree = (None, 0)
+
+	def query(self, X, d):
+		'''The index in X of the sample nearest to d. X must only ever grow, see clear.'''
+		return int(self.query_batch(X, np.reshape(d, (1, -1)))[0])
+
+	def query_batch(self, X, D):
+		'''The indexes in X of the samples nearest to each row of D.'''
+		D = np.asarray(D)
+		tree, covered = self.tree
+		if covered > len(X):
+			tree, covered = None, 0
+		if cKDTree is not None and len(X) - covered > self.max_tail:
+			self.rebuild(X)
+
+		best = np.full(len(D), -1, dtype=np.intp)
+		best_dist = np.full(len(D), np.inf)
+		if tree is not None:
+			# One call for the whole batch
+			dist, best = tree.query(D)
+			best_dist = dist * dist
+		tail = X[covered:]
+		if len(tail):
+			for k, d in enumerate(D):
+				diff = np.subtract(tail, d, dtype=np.int64)
+				dists = np.einsum('ij,ij->i', diff, diff)
+				j = int(dists.argmin())
+				if dists[j] < best_dist[k]:
+					best[k] = covered + j
+		return best
+
+	def rebuild(self, X):
+		with self.lock:
+			if self.building:
+				return
+			self.building = True
+			generation = self.generation
+		if self.background:
+			threading.Thread(target=self.build, args=(X, generation), name='pyomyo-index', daemon=True).start()
+		else:
+			self.build(X, generation)
+
+	def build(self, X, generation):
+		tree = None
+		try:
+			tree = cKDTree(X)
+		finally:
+			with self.lock:
+				if tree is not None and generation == self.generation:
+					self.tree = (tree, len(X))
+				self.building = False
+
+	def wait(self):
+		'''Waits for a background rebuild to finish, for benchmarks and tests.'''
+		while self.building:
+			time.sleep(0.001)
+
 class Classifier(object):
 	'''A wrapper for nearest-neighbor classifier that stores
-	training data in vals0, ..., vals9.dat.'''
+	training data in data/samples.dat, see pyomyo.datafile.'''
 
 	def __init__(self, name="Classifier", color=(0,200,0)):
 		# Add some identifiers to the classifier to identify what model was used in different screenshots
 		self.name = name
 		self.color = color
-
-		for i in range(10):
-			with open('data/vals%d.dat' % i, 'ab') as f: pass
+		# The training data, X and Y are views of it, and of the file until a sample is added
+		self.store = SampleStore()
+		self.index = NearestIndex()
+
+		if os.path.exists(SAMPLES):
+			self.file = SampleFile(SAMPLES)
+		else:
+			# Once, from the data/vals0.dat, ..., vals9.dat of earlier versions
+			self.file = migrate_dat('data', SAMPLES)
 		self.read_data()
 
 	def store_data(self, cls, vals):
-		with open('data/vals%d.dat' % cls, 'ab') as f:
-			f.write(pack('8H', *vals))
+		# Buffered, written a block at a time, see flush_data
+		self.file.append(cls, vals)
 
-		self.train(np.vstack([self.X, vals]), np.hstack([self.Y, [cls]]))
+		self.store.append(cls, vals)
+		self.train(self.store.X, self.store.Y)
+
+	def flush_data(self):
+		'''Writes the samples stored but still buffered.'''
+		self.file.flush()
 
 	def read_data(self):
-		X = []
-		Y = []
-		for i in range(10):
-			X.append(np.fromfile('data/vals%d.dat' % i, dtype=np.uint16).reshape((-1, 8)))
-			Y.append(i + np.zeros(X[-1].shape[0]))
+		self.store.clear()
+		self.index.clear()
+		self.file.load()
+		self.store.load(self.file.data['emg'], self.file.data['label'])
 
-		self.train(np.vstack(X), np.hstack(Y))
+		self.train(self.store.X, self.store.Y)
 
 	def delete_data(self):
-		for i in range(10):
-			with open('data/vals%d.dat' % i, 'wb') as f: pass
+		# Let go of the map first, a mapped file can't be replaced on Windows
+		self.store.clear()
+		self.train(self.store.X, self.store.Y)
+		self.file.clear()
 		self.read_data()
 
 	def train(self, X, Y):
@@ -74,31 +253,56 @@ class Classifier(object):
 		self.model = None
 
 	def nearest(self, d):
-		dists = ((self.X - d)**2).sum(1)
-		ind = dists.argmin()
-		return self.Y[ind]
+		ind = self.index.query(self.X, d)
+		return int(self.Y[ind])
 
 	def classify(self, d):
 		if self.X.shape[0] < K * SUBSAMPLE: return 0
 		return self.nearest(d)
 
+	def classify_batch(self, X):
+		'''
+		The classes of the (n, 8) samples X, as classify would give them one
+		at a time. Subclasses that override classify should override this too.
+		'''
+		if self.X.shape[0] < K * SUBSAMPLE: return np.zeros(len(X), dtype=int)
+		return self.Y[self.index.query_batch(self.X, X)].astype(int)
+
 class MyoClassifier(Myo):
-	'''Adds higher-level pose classification and handling onto Myo.'''
+	'''
+	Adds higher-level pose classification and handling onto Myo.
 
-	def __init__(self, cls, tty=None, mode=emg_mode.PREPROCESSED, hist_len=25):
+	With latency, samples are collected for up to latency seconds and
+	classified a batch at a time with cls.classify_batch, which for sklearn
+	models is one predict call instead of one per sample. The votes are
+	still counted one sample at a time, in order.
+	'''
+
+	def __init__(self, cls, tty=None, mode=emg_mode.PREPROCESSED, hist_len=25, latency=None):
 		Myo.__init__(self, tty, mode=mode)
 		# Add a classifier
 		self.cls = cls
 		self.hist_len = hist_len
 		self.history = deque([0] * self.hist_len, self.hist_len)
 		self.history_cnt = Counter(self.history)
-		self.add_emg_handler(self.emg_handler)
+		if latency is None:
+			self.add_emg_handler(self.emg_handler)
+		else:
+			# At most a second of raw EMG per batch, if the handlers fall behind
+			self.add_emg_batch_handler(self.emg_batch_handler, size=200, latency=latency)
 		self.last_pose = None
 
 		self.pose_handlers = []
 
 	def emg_handler(self, emg, moving):
-		y = self.cls.classify(emg)
+		self.vote(self.cls.classify(emg))
+
+	def emg_batch_handler(self, emg):
+		for y in self.cls.classify_batch(emg):
+			self.vote(int(y))
+
+	def vote(self, y):
+		'''Adds the class of the latest sample to the history, and reports a pose once it has a clear majority.'''
 		self.history_cnt[self.history[0]] -= 1
 		self.history_cnt[y] += 1
 		self.history.append(y)
@@ -136,6 +340,7 @@ class MyoClassifier(Myo):
 				if K_0 <= ev.key <= K_9 or K_KP0 <= ev.key <= K_KP9:
 					# Don't record incoming data
 					hnd.recording = -1
+					self.cls.flush_data()
 
 		# Plotting
 		scr.fill((0, 0, 0), (0, 0, w, h))
@@ -147,7 +352,7 @@ class MyoClassifier(Myo):
 			# Set the barplot color
 			clr = self.cls.color if i == r else (255,255,255)
 
-			txt = font.render('%5d' % (self.cls.Y == i).sum(), True, (255,255,255))
+			txt = font.render('%5d' % self.cls.file.label_count(i), True, (255,255,255))
 			scr.blit(txt, (x + 20, y))
 
 			txt = font.render('%d' % i, True, clr)
@@ -180,31 +385,202 @@ class EMGHandler(object):
 		if self.recording >= 0:
 			self.m.cls.store_data(self.recording, emg)
 
+def fresh_copy(estimator):
+	'''An unfitted copy of estimator, with sklearn.base.clone if sklearn is around and it is an sklearn estimator.'''
+	try:
+		from sklearn.base import clone
+	except ImportError:
+		return copy.deepcopy(estimator)
+	try:
+		return clone(estimator)
+	except TypeError:
+		# Not an sklearn estimator, no get_params
+		return copy.deepcopy(estimator)
+
+class BackgroundTrainer(object):
+	'''
+	Refits a model on a worker thread, so labelling and classifying never
+	wait for it.
+
+	Submitted training sets are coalesced: a refit starts at most every
+	interval seconds, or sooner once batch new samples are waiting, always
+	on the latest set. Each refit works on its own copy of the model and
+	hands it to on_fitted when done, the model in use is never modified.
+	Models with partial_fit are updated with the new samples only, unless
+	the training set was replaced (reset). partial_fit needs every class up
+	front: classes if given, otherwise those in the training set, and a
+	label not seen before then means a fit from scratch.
+	'''
+
+	def __init__(self, estimator, on_fitted, interval=0.5, batch=200, classes=None):
+		self.estimator = estimator
+		self.on_fitted = on_fitted
+		self.interval = interval
+		self.batch = batch
+		self.classes = None if classes is None else np.asarray(classes)
+		# The classes the last fitted model was told about
+		self.known = None
+		self.cond = threading.Condition()
+		# Latest training set not fitted yet, and whether it replaces the last one
+		self.wanted = None
+		self.reset = False
+		self.busy = False
+		self.stopping = False
+		# The last fitted model and the number of samples it has seen
+		self.model = None
+		self.fitted = 0
+		self.last_fit = 0.0
+		self.fits = 0
+		self.error = None
+		self.thread = threading.Thread(target=self.run, name='pyomyo-trainer', daemon=True)
+		self.thread.start()
+
+	def submit(self, X, Y, reset=False):
+		'''Asks for a refit on X, Y. They must not change afterwards, SampleStore views don't.'''
+		with self.cond:
+			self.wanted = (X, Y)
+			self.reset = self.reset or reset
+			self.cond.notify_all()
+
+	def waiting(self):
+		'''Samples submitted but not fitted yet.'''
+		if self.wanted is None:
+			return 0
+		return len(self.wanted[0]) - self.fitted if not self.reset else len(self.wanted[0])
+
+	def run(self):
+		while True:
+			with self.cond:
+				while self.wanted is None and not self.stopping:
+					self.cond.wait()
+				# Wait out the interval since the last fit, unless enough samples are waiting
+				while not self.stopping:
+					left = self.last_fit + self.interval - time.monotonic()
+					if left <= 0 or self.waiting() >= self.batch:
+						break
+					self.cond.wait(left)
+				if self.stopping:
+					return
+				(X, Y), reset = self.wanted, self.reset
+				self.wanted = None
+				self.reset = False
+				self.busy = True
+			try:
+				model = self.fit(X, Y, reset)
+			except Exception as e:
+				# Not enough classes yet and the like, keep the last model
+				self.error = e
+			else:
+				self.error = None
+				self.model = model
+				self.fitted = len(X)
+				self.fits += 1
+				self.on_fitted(model)
+			with self.cond:
+				self.busy = False
+				self.last_fit = time.monotonic()
+				self.cond.notify_all()
+
+	def fit(self, X, Y, reset):
+		if len(X) == 0:
+			return None
+		if (self.model is not None and hasattr(self.model, 'partial_fit') and not reset and len(X) >= self.fitted
+				and np.isin(Y[self.fitted:], self.known).all()):
+			model = copy.deepcopy(self.model)
+			model.partial_fit(X[self.fitted:], Y[self.fitted:])
+			return model
+		model = fresh_copy(self.estimator)
+		if hasattr(model, 'partial_fit'):
+			classes = self.classes if self.classes is not None else np.unique(Y)
+			model.partial_fit(X, Y, classes=classes)
+			self.known = classes
+		else:
+			model.fit(X, Y)
+		return model
+
+	def wait(self, timeout=None):
+		'''Waits until everything submitted has been fitted. Returns False on timeout.'''
+		deadline = None if timeout is None else time.monotonic() + timeout
+		with self.cond:
+			while self.wanted is not None or self.busy:
+				left = None if deadline is None else deadline - time.monotonic()
+				if left is not None and left <= 0:
+					return False
+				self.cond.wait(left)
+		return True
+
+	def stop(self):
+		with self.cond:
+			self.stopping = True
+			self.cond.notify_all()
+		if self.thread is not threading.current_thread():
+			self.thread.join()
+
 class Live_Classifier(Classifier):
 	'''
 	General class for all Sklearn classifiers
 	Expects something you can call .fit and .predict on
+
+	With background, the model is refit on a worker thread instead of on
+	every labelled sample, at most every interval seconds or once batch
+	new samples are waiting, see BackgroundTrainer. classify keeps using
+	the last fitted model meanwhile. classes, for models with partial_fit,
+	are all the labels there will be, by default those labelled so far.
 	'''
-	def __init__(self, classifier, name="Live Classifier", color=(0,55,175)):
+	def __init__(self, classifier, name="Live Classifier", color=(0,55,175), background=False, interval=0.5, batch=200, classes=None):
+		self.trainer = None
+		# Set by read_data, the next training set replaces the last one
+		self.reset = False
+		if background:
+			self.trainer = BackgroundTrainer(classifier, self.swap_model, interval, batch, classes)
+			# Nothing fitted yet
+			classifier = None
 		self.model = classifier
 		Classifier.__init__(self, name=name, color=color)
 
+	def read_data(self):
+		if self.trainer is not None:
+			# The training set is replaced, no partial_fit from the last one
+			self.reset = True
+		Classifier.read_data(self)
+
 	def train(self, X, Y):
 		self.X = X
 		self.Y = Y
 
+		if self.trainer is not None:
+			self.trainer.submit(X, Y, reset=self.reset)
+			self.reset = False
+			return
+
 		if self.X.shape[0] > 0 and self.Y.shape[0] > 0: 
 			self.model.fit(self.X, self.Y)
 
+	def swap_model(self, model):
+		# A single assignment, classify sees either the old model or the new one
+		self.model = model
+
+	def stop_training(self):
+		'''Stops the background training thread, if any.'''
+		if self.trainer is not None:
+			self.trainer.stop()
+
 	def classify(self, emg):
-		if self.X.shape[0] == 0 or self.model == None:
+		model = self.model
+		if self.X.shape[0] == 0 or model == None:
 			# We have no data or model, return 0
 			return 0
 
 		x = np.array(emg).reshape(1,-1)
-		pred = self.model.predict(x)
+		pred = model.predict(x)
 		return int(pred[0])
 
+	def classify_batch(self, X):
+		model = self.model
+		if self.X.shape[0] == 0 or model == None:
+			return np.zeros(len(X), dtype=int)
+		return model.predict(np.asarray(X)).astype(int)
+
 if __name__ == '__main__':
 	pygame.init()
 	w, h = 800, 320
@@ -232,5 +608,6 @@ if __name__ == '__main__':
 		pass
 	finally:
 		m.disconnect()
+		m.cls.flush_data()
 		print()
 		pygame.quit()
@@ -0,0 +1,298 @@
+'''
+asyncio transport for the Myo.
+
+AsyncMyo reads the dongle from the event loop instead of a blocking
+recv_packet loop, so one process can drive a Myo next to an async web
+server, or several Myos, without a thread or process per device.
+
+	async def main():
+		m = AsyncMyo(mode=emg_mode.RAW)
+		await m.connect()
+		await m.write_attr(0x19, b'\x03\x01\x01')  # vibrate
+		async for emg, moving in m.emg():
+			print(emg)
+
+Commands return futures that are resolved by the matching (cls, cmd)
+response, attribute reads and writes are resolved by the matching event.
+'''
+
+import asyncio
+import time
+from collections import deque
+
+from pyomyo.pyomyo import BTTimeoutError, Myo, MYO_SCAN_UUID, dedupe_writes, pack, unpack
+
+class AsyncMyo(Myo):
+	'''
+	A Myo driven by an asyncio event loop.
+
+	The inherited helpers that write to the Myo (vibrate, set_leds,
+	sleep_mode, start_raw, ...) schedule their writes and return straight
+	away. Writes run one after the other in the order they were made, await
+	drain() to wait for them.
+	'''
+
+	def __init__(self, tty=None, mode=1):
+		Myo.__init__(self, tty, mode=mode)
+		# (cls, cmd) -> futures waiting for that response, oldest first
+		self.responses = {}
+		# (cls, cmd) -> [(future, match)] waiting for that event
+		self.events = {}
+		self.writes = set()
+		self.attr_lock = None
+		self.loop = None
+		self.poller = None
+		# Hands over a waiting batch on time if the stream stalls
+		self.batch_timer = None
+		self.bt.add_handler(self.resolve_event)
+
+	# reading from the port
+	def open(self):
+		'''Starts reading the dongle from the running event loop.'''
+		if self.loop is not None:
+			return
+		self.loop = asyncio.get_running_loop()
+		self.attr_lock = asyncio.Lock()
+		self.bt.ser.timeout = 0
+		try:
+			self.loop.add_reader(self.bt.ser.fileno(), self.on_readable)
+		except (AttributeError, NotImplementedError, OSError, ValueError):
+			# No file descriptor (Windows, fake ports) or a loop without add_reader
+			self.poller = self.loop.create_task(self.poll())
+
+	def close(self):
+		'''Stops reading and closes the serial port.'''
+		if self.loop is None:
+			return
+		if self.batch_timer is not None:
+			self.batch_timer.cancel()
+			self.batch_timer = None
+		if self.poller is not None:
+			self.poller.cancel()
+			self.poller = None
+		else:
+			self.loop.remove_reader(self.bt.ser.fileno())
+		self.loop = None
+		self.bt.close()
+
+	async def poll(self, interval=0.002):
+		while True:
+			self.on_readable()
+			await asyncio.sleep(interval)
+
+	def on_readable(self):
+		packets = self.bt.read_chunk()
+		if not packets:
+			return
+		for p in packets:
+			if p.typ == 0:
+				self.resolve_response(p)
+			else:
+				self.bt.handle_event(p)
+		self.schedule_batches()
+
+	def schedule_batches(self):
+		'''Hands over the batches that are due, and wakes up again when the next one is.'''
+		due = self.poll_batches()
+		if self.batch_timer is not None:
+			self.batch_timer.cancel()
+		self.batch_timer = None if due is None or self.loop is None else self.loop.call_later(due, self.schedule_batches)
+
+	def resolve_response(self, p):
+		waiting = self.responses.get((p.cls, p.cmd))
+		if not waiting:
+			return
+		# Responses come in the order the commands were sent
+		fut = waiting.popleft()
+		if not fut.done():
+			# The payload is a view into the framer, keep a copy for whoever awaits it
+			p.payload = bytes(p.payload)
+			fut.set_result(p)
+
+	def resolve_event(self, p):
+		waiting = self.events.get((p.cls, p.cmd))
+		if not waiting:
+			return
+		for entry in list(waiting):
+			fut, match = entry
+			if fut.done():
+				waiting.remove(entry)
+			elif match is None or match(p):
+				waiting.remove(entry)
+				p.payload = bytes(p.payload)
+				fut.set_result(p)
+				return
+
+	# BLE commands
+	def send_command(self, cls, cmd, payload=b''):
+		'''Sends a command, returns a future resolved with its response packet.'''
+		fut = self.loop.create_future()
+		waiting = self.responses.setdefault((cls, cmd), deque())
+		waiting.append(fut)
+		# If the caller gives up, on a timeout say, the next response is for the next command
+		fut.add_done_callback(lambda f: f.cancelled() and self.forget_response(waiting, f))
+		header = pack('4B', 0, len(payload), cls, cmd)
+		self.bt.ser.write(header + payload)
+		if self.bt.capture is not None:
+			self.bt.capture.write_raw(header, payload, direction=1) # TX
+		return fut
+
+	def forget_response(self, waiting, fut):
+		try:
+			waiting.remove(fut)
+		except ValueError:
+			pass
+
+	def wait_event(self, cls, cmd, match=None):
+		'''Returns a future resolved with the next (cls, cmd) event for which match(p) is true.'''
+		fut = self.loop.create_future()
+		self.events.setdefault((cls, cmd), []).append((fut, match))
+		return fut
+
+	def for_attr(self, attr):
+		'''Matches attribute value events for attr on our connection.'''
+		conn = self.conn
+
+		def match(p):
+			c, a = unpack('BH', p.payload[:3])
+			return c == conn and a == attr
+		return match
+
+	def for_conn(self):
+		'''Matches events whose first payload byte is our connection.'''
+		conn = self.conn
+		return lambda p: p.payload[0] == conn
+
+	async def read_attr_now(self, attr):
+		async with self.attr_lock:
+			value = self.wait_event(4, 5, self.for_attr(attr))
+			await self.send_command(4, 4, pack('BH', self.conn, attr))
+			return await value
+
+	async def write_attr_now(self, attr, val):
+		async with self.attr_lock:
+			done = self.wait_event(4, 1, self.for_conn())
+			await self.send_command(4, 5, pack('BHB', self.conn, attr, len(val)) + val)
+			return await done
+
+	def read_attr(self, attr):
+		'''Returns a task resolved with the attribute value event.'''
+		return self.track(self.read_attr_now(attr))
+
+	def write_attr(self, attr, val):
+		'''Returns a task resolved with the procedure completed event.'''
+		return self.track(self.write_attr_now(attr, val))
+
+	def write_attrs(self, writes):
+		'''Schedules [(attr, value)] like write_attr, less the writes that change nothing, see Myo.write_attrs.'''
+		for attr, val in dedupe_writes(writes):
+			self.write_attr(attr, val)
+
+	def track(self, coro):
+		task = self.loop.create_task(coro)
+		self.writes.add(task)
+		task.add_done_callback(self.writes.discard)
+		return task
+
+	async def drain(self):
+		'''Waits for every read and write made so far.'''
+		while self.writes:
+			await asyncio.gather(*list(self.writes))
+
+	async def connect(self, addr=None, timeout=None):
+		'''
+		Connect to a Myo
+		Addr is the MAC address in format: [93, 41, 55, 245, 82, 194]
+		Raises BTTimeoutError if it takes longer than timeout seconds.
+		'''
+		self.open()
+		self.connect_started = time.monotonic()
+		self.time_to_first_emg = None
+		try:
+			await asyncio.wait_for(self.handshake(addr), timeout)
+		except asyncio.TimeoutError:
+			self.conn = None
+			raise BTTimeoutError('no answer from the Myo in time')
+
+	async def handshake(self, addr):
+
+		# stop everything from before
+		await self.send_command(6, 4)
+		for h in range(3):
+			await self.send_command(3, 0, pack('B', h))
+
+		# start scanning
+		if addr is None:
+			print('scanning...')
+			found = self.wait_event(6, 0, lambda p: bytes(p.payload).endswith(MYO_SCAN_UUID))
+			await self.send_command(6, 2, b'\x01')
+			p = await found
+			addr = list(p.payload[2:8])
+			await self.send_command(6, 4)
+
+		# connect and wait for status event
+		status = self.wait_event(3, 0)
+		conn_pkt = await self.send_command(6, 3, pack('6sBHHHH', bytes(addr), 0, 6, 6, 64, 0))
+		self.conn = conn_pkt.payload[-1]
+		await status
+
+		# get firmware version
+		fw = await self.read_attr(0x17)
+		_, _, _, _, v0, v1, v2, v3 = unpack('BHBBHHHH', fw.payload)
+		print('firmware version: %d.%d.%d.%d' % (v0, v1, v2, v3))
+
+		self.old = (v0 == 0)
+
+		if not self.old:
+			name = await self.read_attr(0x03)
+			print('device name: %s' % bytes(name.payload))
+
+		# add data handlers, before configuring so the first samples aren't missed
+		self.bt.remove_handler(self.handle_data)
+		self.bt.add_handler(self.handle_data)
+
+		self.configure()
+		await self.drain()
+
+	def disconnect(self):
+		if self.conn is not None:
+			return self.send_command(3, 0, pack('B', self.conn))
+
+	def start(self, *args, **kwargs):
+		raise RuntimeError('AsyncMyo is read by its event loop, use open() instead')
+
+	def run(self):
+		raise RuntimeError('AsyncMyo is read by its event loop, use open() instead')
+
+	# streaming
+	async def emg(self, maxsize=1024):
+		'''Yields (emg, moving) for every EMG sample, dropping the oldest if the consumer falls behind.'''
+		q = asyncio.Queue(maxsize)
+
+		def h(emg, moving):
+			self.put_latest(q, (emg, moving))
+		self.add_emg_handler(h)
+		try:
+			while True:
+				yield await q.get()
+		finally:
+			self.emg_handlers.remove(h)
+
+	async def imu(self, maxsize=1024):
+		'''Yields (quat, acc, gyro) for every IMU sample, dropping the oldest if the consumer falls behind.'''
+		q = asyncio.Queue(maxsize)
+
+		def h(quat, acc, gyro):
+			self.put_latest(q, (quat, acc, gyro))
+		self.add_imu_handler(h)
+		try:
+			while True:
+				yield await q.get()
+		finally:
+			self.imu_handlers.remove(h)
+
+	def put_latest(self, q, item):
+		if q.full():
+			q.get_nowait()
+			self.queue_drops += 1
+		q.put_nowait(item)
@@ -0,0 +1,304 @@
+'''
+Recording and replaying the raw packets of a BLE session.
+
+A capture is an append-only binary file of every packet exchanged with the
+dongle, each stamped with time.monotonic_ns(). It is what the Myo actually
+sent, so driver bugs can be reproduced, and new decoders or models re-run,
+on exactly the bytes seen at the time.
+
+	m = Myo(mode=emg_mode.RAW)
+	m.start_capture('session.cap')
+	m.connect()
+	...
+	m.stop_capture()
+
+	# later, through the same driver code, 10 times faster than real time
+	m = Myo(ReplaySerial('session.cap', speed=10), mode=emg_mode.RAW)
+	m.connect()
+
+Layout, little endian:
+	file header:  magic b'MYOC', version (H), record header size (H), wall clock time at creation (d)
+	every record: monotonic time in ns (Q), packet length (H), direction (B), then the packet
+Direction is RX for packets from the dongle and TX for commands sent to it.
+A record cut short by a crash is ignored when reading.
+'''
+
+from array import array
+import bisect
+import mmap
+import os
+import struct
+import threading
+import time
+
+MAGIC = b'MYOC'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sHHd')
+RECORD = struct.Struct('<QHB')
+
+# Record directions
+RX = 0
+TX = 1
+
+
+class CaptureError(ValueError):
+	'''The file is not a capture, or a version this module can't read.'''
+
+
+def check_header(data, path):
+	if len(data) < FILE_HEADER.size:
+		raise CaptureError('%s: too short for a capture' % path)
+	magic, version, record_size, created = FILE_HEADER.unpack_from(data)
+	if magic != MAGIC:
+		raise CaptureError('%s: not a capture file' % path)
+	if version != VERSION or record_size != RECORD.size:
+		raise CaptureError('%s: unsupported capture version %d' % (path, version))
+	return created
+
+
+class CaptureWriter(object):
+	'''
+	Appends packets to a capture file.
+	Opening an existing capture appends to it, so one file can hold several sessions.
+	'''
+
+	def __init__(self, path):
+		self.path = path
+		self.lock = threading.Lock()
+		self.file = open(path, 'ab')
+		if self.file.tell() == 0:
+			self.file.write(FILE_HEADER.pack(MAGIC, VERSION, RECORD.size, time.time()))
+		else:
+			with open(path, 'rb') as f:
+				check_header(f.read(FILE_HEADER.size), path)
+		self.records = 0
+
+	def write(self, p, t_ns=None, direction=RX):
+		'''Records a framed Packet.'''
+		payload = p.payload
+		header = bytes((p.typ, len(payload) & 0xff, p.cls, p.cmd))
+		self.write_raw(header, payload, t_ns, direction)
+
+	def write_packets(self, packets, t_ns=None):
+		'''Records packets received together, all with the same timestamp.'''
+		if t_ns is None:
+			t_ns = time.monotonic_ns()
+		for p in packets:
+			self.write(p, t_ns)
+
+	def write_raw(self, header, payload=b'', t_ns=None, direction=RX):
+		'''Records a packet given as its 4 byte header and its payload.'''
+		if t_ns is None:
+			t_ns = time.monotonic_ns()
+		with self.lock:
+			if self.file is None:
+				return
+			self.file.write(RECORD.pack(t_ns, len(header) + len(payload), direction))
+			self.file.write(header)
+			self.file.write(payload)
+			self.records += 1
+
+	def flush(self):
+		with self.lock:
+			if self.file is not None:
+				self.file.flush()
+
+	def close(self):
+		with self.lock:
+			if self.file is not None:
+				self.file.close()
+				self.file = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+class CaptureReader(object):
+	'''
+	Reads a capture through a memory map.
+
+	Iterating yields (t_ns, direction, data) for every record, where data is
+	a memoryview of the whole packet in the map. Packet(data) frames it like
+	the driver does. Views must be released, or copied with bytes(), before
+	the reader is closed.
+	'''
+
+	def __init__(self, path):
+		self.path = path
+		self.file = open(path, 'rb')
+		size = os.fstat(self.file.fileno()).st_size
+		if size == 0:
+			self.file.close()
+			raise CaptureError('%s: empty file' % path)
+		self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+		self.view = memoryview(self.map)
+		self.created = check_header(self.view, path)
+
+	def __iter__(self):
+		view = self.view
+		for t_ns, direction, offset, n in self.records():
+			yield t_ns, direction, view[offset:offset + n]
+
+	def records(self):
+		'''(t_ns, direction, offset, length) of every record, its packet is view[offset:offset + length].'''
+		view = self.view
+		end = len(view)
+		pos = FILE_HEADER.size
+		while pos + RECORD.size <= end:
+			t_ns, n, direction = RECORD.unpack_from(view, pos)
+			pos += RECORD.size
+			if pos + n > end:
+				# Cut short while writing
+				return
+			yield t_ns, direction, pos, n
+			pos += n
+
+	def received(self):
+		'''(t_ns, data) of the packets that came from the dongle.'''
+		return ((t, data) for t, direction, data in self if direction == RX)
+
+	def close(self):
+		self.view.release()
+		self.map.close()
+		self.file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+class ReplaySerial(object):
+	'''
+	A serial port that plays back the received packets of a capture.
+
+	Bytes become readable with the timing they were captured with, scaled by
+	speed: 1.0 is real time, 10 ten times faster, None as fast as they are
+	read, in the chunks they were read in at the time, so the driver never
+	sees a backlog the live session didn't have. The clock starts at the
+	first read. Writes are accepted and kept in self.writes, nothing
+	answers them but the capture itself, so a session replays exactly when
+	the driver sends the same commands it did then. Once the capture is
+	exhausted, reads return b''. Packets are read from the capture's map
+	as they are asked for, close() unmaps it.
+	'''
+
+	def __init__(self, path, speed=1.0, timeout=None):
+		self.speed = speed
+		self.timeout = timeout
+		self.is_open = True
+		self.writes = []
+
+		self.reader = CaptureReader(path)
+		# For every received packet, the seconds after the first one it was
+		# received, where it ends in the stream of received bytes and where it is in the map
+		self.times = array('d')
+		self.ends = array('q')
+		self.offsets = array('q')
+		t0 = None
+		size = 0
+		for t_ns, direction, offset, n in self.reader.records():
+			if direction != RX:
+				continue
+			if t0 is None:
+				t0 = t_ns
+			size += n
+			self.times.append((t_ns - t0) / 1e9)
+			self.ends.append(size)
+			self.offsets.append(offset)
+		self.size = size
+		self.pos = 0
+		self.start = None
+
+	# replay clock
+	def elapsed(self):
+		if self.start is None:
+			self.start = time.monotonic()
+		if self.speed is None:
+			return float('inf')
+		return (time.monotonic() - self.start) * self.speed
+
+	def available(self):
+		'''End of the bytes released by now.'''
+		if self.speed is None:
+			# Up to the end of the chunk the next unread packet came in, packets read together share a time
+			i = bisect.bisect_right(self.ends, self.pos)
+			if i >= len(self.times):
+				return self.size
+			i = bisect.bisect_right(self.times, self.times[i])
+			return self.ends[i - 1]
+		i = bisect.bisect_right(self.times, self.elapsed())
+		return self.ends[i - 1] if i else 0
+
+	def next_due(self):
+		'''Seconds of real time until the next packet is released, None once all are.'''
+		elapsed = self.elapsed()
+		i = bisect.bisect_right(self.times, elapsed)
+		if i >= len(self.times):
+			return None
+		return (self.times[i] - elapsed) / self.speed
+
+	@property
+	def done(self):
+		return self.pos >= self.size
+
+	def bytes_between(self, start, end):
+		'''Bytes start to end of the received stream, from the packets in the map.'''
+		parts = []
+		i = bisect.bisect_right(self.ends, start)
+		while start < end:
+			packet_start = self.ends[i - 1] if i else 0
+			n = min(end, self.ends[i]) - start
+			offset = self.offsets[i] + start - packet_start
+			parts.append(self.reader.view[offset:offset + n])
+			start += n
+			i += 1
+		data = b''.join(parts)
+		# The map can't be closed while a view of it is alive
+		for part in parts:
+			part.release()
+		return data
+
+	# serial port interface
+	def write(self, data):
+		self.writes.append(bytes(data))
+		return len(data)
+
+	def inWaiting(self):
+		return self.available() - self.pos
+
+	in_waiting = property(inWaiting)
+
+	def read(self, size=1):
+		deadline = None if self.timeout is None else time.monotonic() + self.timeout
+		while True:
+			end = min(self.available(), self.pos + size)
+			if end - self.pos >= size or self.done:
+				break
+			wait = self.next_due()
+			if wait is None:
+				break
+			if deadline is not None:
+				left = deadline - time.monotonic()
+				if left <= 0:
+					break
+				wait = min(wait, left)
+			time.sleep(min(wait, 0.05))
+		end = min(self.available(), self.pos + size)
+		data = self.bytes_between(self.pos, end)
+		self.pos = end
+		return data
+
+	def flushInput(self):
+		self.pos = max(self.pos, self.available())
+
+	reset_input_buffer = flushInput
+
+	def close(self):
+		if self.is_open:
+			self.is_open = False
+			self.reader.close()
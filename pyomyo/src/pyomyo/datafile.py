@@ -0,0 +1,214 @@
+'''
+Labelled EMG samples in a single append-only file.
+
+A 64 byte header, then fixed width rows of the time a sample was labelled,
+its channels and its label. Appends are buffered and written a block at a
+time, loading maps the file with np.memmap instead of reading it, and the
+rows of every label are indexed by their position in the file.
+
+	f = SampleFile('data/samples.dat')
+	f.append(3, emg)
+	f.flush()
+
+	f.load()
+	X, Y = f.data['emg'], f.data['label'] # (n, 8) and (n,), views of the file
+	rows = f.offsets(3) # positions of the samples labelled 3
+	f.label_count(3) # how many there are
+
+Any integer label fits, there is no limit of 10 classes. Files from before,
+one data/valsN.dat per class, are copied over once by migrate_dat.
+'''
+
+import os
+import time
+
+import numpy as np
+
+MAGIC = b'PMSF'
+VERSION = 1
+HEADER = np.dtype([
+	('magic', 'S4'),
+	('version', '<u4'),
+	('channels', '<i8'),
+	('dtype', 'S8'),
+])
+HEADER_SIZE = 64
+
+
+def row_dtype(channels, dtype):
+	'''Rows of the time a sample was labelled (time.time() seconds), its channels and its label.'''
+	return np.dtype([
+		('t', '<f8'),
+		('emg', np.dtype(dtype).newbyteorder('<'), (channels,)),
+		('label', '<i2'),
+	])
+
+
+class SampleFile(object):
+	'''
+	Labelled samples appended to the file at path, created if missing.
+
+	Appended rows are kept in memory until size rows are waiting or latency
+	seconds have passed since the first of them, then written in one go.
+	data is a memmap of the rows there were at the last load(), rows
+	appended since are only in the file, and in offsets, after a flush.
+	A row half written when the program died is dropped on opening.
+	'''
+
+	def __init__(self, path, channels=8, dtype=np.uint16, size=256, latency=1.0):
+		self.path = path
+		self.size = size
+		self.latency = latency
+		if not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE:
+			self.create(channels, dtype)
+		with open(path, 'rb') as f:
+			header = np.frombuffer(f.read(HEADER_SIZE), dtype=HEADER, count=1)[0]
+		if header['magic'] != MAGIC or header['version'] != VERSION:
+			raise ValueError('%s is not a pyomyo sample file' % path)
+		self.rows = row_dtype(int(header['channels']), header['dtype'].decode())
+		self.pending = np.empty(size, dtype=self.rows)
+		self.n = 0
+		self.first = 0.0
+		self.data = None
+		self.file = open(path, 'ab')
+		# Drop a row half written when the program died, the next would be misaligned
+		whole = (os.path.getsize(path) - HEADER_SIZE) // self.rows.itemsize
+		self.file.truncate(HEADER_SIZE + whole * self.rows.itemsize)
+		self.load()
+
+	def create(self, channels, dtype):
+		header = np.zeros(1, dtype=HEADER)
+		header['magic'] = MAGIC
+		header['version'] = VERSION
+		header['channels'] = channels
+		header['dtype'] = np.dtype(dtype).newbyteorder('<').str.encode()
+		with open(self.path, 'wb') as f:
+			f.write(header.tobytes().ljust(HEADER_SIZE, b'\0'))
+
+	def __len__(self):
+		'''Rows stored, including those not written yet.'''
+		return self.count + self.n
+
+	# writing
+	def append(self, label, emg, t=None):
+		'''Adds a sample, labelled at time t, by default now.'''
+		if self.n == 0:
+			self.first = time.monotonic()
+		row = self.pending[self.n]
+		row['t'] = time.time() if t is None else t
+		row['emg'] = emg
+		row['label'] = label
+		self.n += 1
+		if self.n >= self.size or time.monotonic() - self.first >= self.latency:
+			self.flush()
+
+	def extend(self, labels, emg, t=np.nan):
+		'''Adds (n, channels) samples with their labels, in one write.'''
+		self.flush()
+		rows = np.empty(len(emg), dtype=self.rows)
+		rows['t'] = t
+		rows['emg'] = emg
+		rows['label'] = labels
+		self.write(rows)
+
+	def flush(self):
+		'''Writes the rows waiting in memory.'''
+		if not self.n:
+			return
+		rows = self.pending[:self.n]
+		self.n = 0
+		self.write(rows)
+
+	def write(self, rows):
+		start = self.count
+		self.file.write(rows.tobytes())
+		self.file.flush()
+		self.count += len(rows)
+		# Index the new rows
+		for label in np.unique(rows['label']):
+			at = start + np.flatnonzero(rows['label'] == label)
+			self.added.setdefault(int(label), []).append(at)
+
+	def clear(self):
+		'''Deletes every sample, keeping the header. Views of data from before stay readable.'''
+		self.n = 0
+		# Unmapped first, a mapped file can't be replaced on Windows
+		self.data = None
+		self.file.close()
+		# A new file in its place, reading a view of the old map past the end of a truncated file would crash
+		with open(self.path, 'rb') as f:
+			header = f.read(HEADER_SIZE)
+		partial = self.path + '.partial'
+		with open(partial, 'wb') as f:
+			f.write(header)
+		os.replace(partial, self.path)
+		self.file = open(self.path, 'ab')
+		self.load()
+
+	# reading
+	def load(self):
+		'''Flushes, maps the rows in the file as data and indexes them by label.'''
+		self.flush()
+		rows = (os.path.getsize(self.path) - HEADER_SIZE) // self.rows.itemsize
+		if rows:
+			self.data = np.memmap(self.path, dtype=self.rows, mode='r', offset=HEADER_SIZE, shape=(rows,))
+		else:
+			# np.memmap can't map nothing
+			self.data = np.empty(0, dtype=self.rows)
+		self.count = rows
+		# The index of the mapped rows is built when first needed, that of the rows added since as they are written
+		self.index = None
+		self.added = {}
+
+	def build_index(self):
+		# Positions of each label, from one stable sort of the labels
+		labels = self.data['label']
+		order = np.argsort(labels, kind='stable')
+		found, starts = np.unique(labels[order], return_index=True)
+		self.index = {int(label): rows for label, rows in zip(found, np.split(order, starts[1:]))}
+
+	def labels(self):
+		'''The labels in use, sorted.'''
+		if self.index is None:
+			self.build_index()
+		return sorted(set(self.index) | set(self.added))
+
+	def offsets(self, label):
+		'''Positions in the file of the samples labelled label, in order.'''
+		if self.index is None:
+			self.build_index()
+		parts = [self.index.get(label, np.empty(0, dtype=np.intp))] + self.added.get(label, [])
+		return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+	def label_count(self, label):
+		'''Samples labelled label, including those not written yet.'''
+		if self.index is None:
+			self.build_index()
+		n = len(self.index.get(label, ())) + sum(len(at) for at in self.added.get(label, ()))
+		return n + int(np.count_nonzero(self.pending['label'][:self.n] == label))
+
+	def close(self):
+		self.flush()
+		self.file.close()
+		self.data = None
+
+
+def migrate_dat(folder, path, classes=10):
+	'''
+	Copies the samples in folder/vals0.dat, ..., vals9.dat, the layout used
+	before SampleFile, to a new SampleFile at path. Their times weren't
+	stored, they are NaN. The old files are left as they are.
+	'''
+	# Written aside and renamed, so path is never left half migrated
+	partial = path + '.partial'
+	if os.path.exists(partial):
+		os.remove(partial)
+	f = SampleFile(partial)
+	for i in range(classes):
+		name = os.path.join(folder, 'vals%d.dat' % i)
+		if os.path.exists(name):
+			X = np.fromfile(name, dtype='<u2').reshape((-1, 8))
+			f.extend(np.full(len(X), i), X)
+	f.close()
+	os.replace(partial, path)
+	return SampleFile(path)
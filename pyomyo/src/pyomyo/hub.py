@@ -0,0 +1,124 @@
+'''
+One process owns the Myo, any number of processes read its samples.
+
+MyoHub connects to the Myo in a process of its own and publishes EMG and
+IMU into shared memory ring buffers, instead of pickling every sample into
+a multiprocessing.Queue. Consumers attach to a ring by name, read the
+latest N samples as a NumPy view without copying, and detach, without
+ever touching the dongle.
+
+	hub = MyoHub(mode=emg_mode.FILTERED)
+	hub.start()
+
+	# in this or any other local process
+	emg = SharedRing.attach('pyomyo_emg')
+	window = emg.latest(100) # (100, 8), oldest first
+	# or every sample, once
+	cursor = emg.cursor()
+	samples = cursor.next(timeout=1.0)
+
+See pyomyo.ring. Needs Python 3.8 or later for multiprocessing.shared_memory.
+'''
+
+import multiprocessing
+import time
+
+import numpy as np
+
+from pyomyo.pyomyo import Myo, emg_mode
+from pyomyo.ring import SharedRing
+
+
+class RingPublisher(object):
+	'''Writes EMG straight from the notification payload into a ring, see Myo.emg_batchers.'''
+
+	def __init__(self, ring):
+		self.ring = ring
+
+	def push(self, samples, t=0.0, period=0.0):
+		self.ring.write(samples)
+
+	def poll(self, now):
+		return None
+
+	def flush(self):
+		pass
+
+
+def emg_dtype(mode):
+	'''int8 samples in RAW and FILTERED modes, uint16 in PREPROCESSED mode.'''
+	return np.uint16 if emg_mode(mode) is emg_mode.PREPROCESSED else np.int8
+
+
+def serve(name, mode, tty, stopping, ready, setup, myo_kwargs):
+	'''Runs in the hub's process: connects and publishes until stopping is set.'''
+	emg = SharedRing.attach(name + '_emg', writer=True)
+	imu = SharedRing.attach(name + '_imu', writer=True)
+	m = Myo(tty, mode=mode, **myo_kwargs)
+	try:
+		m.emg_batchers.append(RingPublisher(emg))
+		m.add_imu_handler(lambda quat, acc, gyro: imu.write(quat + acc + gyro))
+		m.connect()
+		if setup is not None:
+			setup(m)
+		ready.set()
+		while not stopping.is_set():
+			m.run()
+		m.disconnect()
+	finally:
+		m.close()
+		emg.close()
+		imu.close()
+
+
+class MyoHub(object):
+	'''
+	Owns the Myo in a process of its own and publishes its samples to the
+	shared memory rings name + '_emg', (n, 8) samples, and name + '_imu',
+	(n, 10) rows of quaternion, accelerometer and gyroscope, as sent by the Myo.
+	setup, if given, is called with the Myo once it is connected, in the
+	hub's process, to set the LEDs, add a battery handler and so on. It has to
+	be a module level function on Windows.
+	'''
+
+	def __init__(self, tty=None, mode=emg_mode.PREPROCESSED, name='pyomyo', capacity=4096, setup=None, **myo_kwargs):
+		self.tty = tty
+		self.mode = mode
+		self.name = name
+		self.setup = setup
+		self.myo_kwargs = myo_kwargs
+		self.emg = SharedRing.create(name + '_emg', capacity, 8, emg_dtype(mode))
+		self.imu = SharedRing.create(name + '_imu', capacity, 10, np.int16)
+		self.stopping = multiprocessing.Event()
+		self.ready = multiprocessing.Event()
+		self.process = None
+
+	def start(self, timeout=None):
+		'''
+		Starts the hub's process. Returns True once it is connected, False if
+		it isn't after timeout seconds or the process died.
+		'''
+		self.process = multiprocessing.Process(target=serve, daemon=True,
+			args=(self.name, self.mode, self.tty, self.stopping, self.ready, self.setup, self.myo_kwargs))
+		self.process.start()
+		deadline = None if timeout is None else time.monotonic() + timeout
+		while not self.ready.wait(0.1):
+			if not self.process.is_alive() or (deadline is not None and time.monotonic() >= deadline):
+				return False
+		return True
+
+	def stop(self):
+		'''Disconnects the Myo, stops the process and frees the rings.'''
+		if self.process is not None:
+			self.stopping.set()
+			self.process.join()
+			self.process = None
+		for ring in (self.emg, self.imu):
+			ring.close()
+			ring.unlink()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.stop()
@@ -0,0 +1,131 @@
+'''
+The Myo's IMU in physical units, a batch at a time.
+
+The Myo sends its orientation as a quaternion, its acceleration and its
+angular velocity as int16, 50 times a second. Myo.add_imu_batch_handler
+hands them over as NumPy structured arrays of IMU_DTYPE, already scaled:
+
+	t     time the sample was taken, time.monotonic() seconds
+	quat  orientation quaternion, w, x, y, z
+	acc   acceleration in g
+	gyro  angular velocity in degrees per second
+
+and the functions here work on whole batches at once:
+
+	def handler(batch):
+		roll, pitch, yaw = to_euler(normalize(batch['quat'])).T
+
+	m.add_imu_batch_handler(handler, size=10)
+'''
+
+import time
+
+import numpy as np
+
+# Divisors from raw int16 to units, from the Myo's Bluetooth protocol (myohw.h)
+ORIENTATION_SCALE = 16384.0
+ACCELEROMETER_SCALE = 2048.0
+GYROSCOPE_SCALE = 16.0
+
+IMU_DTYPE = np.dtype([
+	('t', '<f8'),
+	('quat', '<f8', (4,)),
+	('acc', '<f8', (3,)),
+	('gyro', '<f8', (3,)),
+])
+
+
+def from_raw(raw, t):
+	'''
+	A structured array of IMU_DTYPE from (n, 10) raw values, quaternion,
+	accelerometer and gyroscope as sent by the Myo, taken at times t.
+	'''
+	raw = np.asarray(raw).reshape(-1, 10)
+	out = np.empty(len(raw), dtype=IMU_DTYPE)
+	out['t'] = t
+	out['quat'] = raw[:, :4] / ORIENTATION_SCALE
+	out['acc'] = raw[:, 4:7] / ACCELEROMETER_SCALE
+	out['gyro'] = raw[:, 7:10] / GYROSCOPE_SCALE
+	return out
+
+
+def normalize(quat):
+	'''Unit quaternions from (..., 4) quaternions, which the int16 rounding leaves slightly off.'''
+	quat = np.asarray(quat, dtype=np.float64)
+	norm = np.linalg.norm(quat, axis=-1, keepdims=True)
+	# An all zero quaternion, before the Myo has an orientation, stays zero
+	return np.divide(quat, norm, out=np.zeros_like(quat), where=norm > 0)
+
+
+def to_euler(quat):
+	'''
+	(..., 3) roll, pitch and yaw in radians, rotations about x, y and z
+	applied in z, y, x order, from (..., 4) unit quaternions.
+	'''
+	quat = np.asarray(quat, dtype=np.float64)
+	w, x, y, z = np.moveaxis(quat, -1, 0)
+	roll = np.arctan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y))
+	# Clipped, rounding can take it just past +-1 at +-90 degrees
+	pitch = np.arcsin(np.clip(2 * (w * y - z * x), -1.0, 1.0))
+	yaw = np.arctan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z))
+	return np.stack([roll, pitch, yaw], axis=-1)
+
+
+def to_matrix(quat):
+	'''(..., 3, 3) rotation matrices from (..., 4) unit quaternions.'''
+	quat = np.asarray(quat, dtype=np.float64)
+	w, x, y, z = np.moveaxis(quat, -1, 0)
+	xx, yy, zz = x * x, y * y, z * z
+	xy, xz, yz = x * y, x * z, y * z
+	wx, wy, wz = w * x, w * y, w * z
+	m = np.stack([
+		1 - 2 * (yy + zz), 2 * (xy - wz), 2 * (xz + wy),
+		2 * (xy + wz), 1 - 2 * (xx + zz), 2 * (yz - wx),
+		2 * (xz - wy), 2 * (yz + wx), 1 - 2 * (xx + yy),
+	], axis=-1)
+	return m.reshape(quat.shape[:-1] + (3, 3))
+
+
+class ImuBatcher(object):
+	'''Collects raw IMU samples and hands them to a batch handler in units, see Myo.add_imu_batch_handler.'''
+
+	def __init__(self, myo, handler, size, latency):
+		self.myo = myo
+		self.handler = handler
+		self.size = size
+		self.latency = latency
+		self.raw = np.empty((size, 10), dtype=np.int16)
+		self.times = np.empty(size)
+		self.n = 0
+		self.first = 0.0
+
+	def push(self, raw, t, period=0.0):
+		'''Adds a sample, its 10 raw values, taken at time t. The next is due period seconds later.'''
+		if self.n == 0 and self.latency is not None:
+			self.first = time.monotonic()
+		self.raw[self.n] = raw
+		self.times[self.n] = t
+		self.n += 1
+		if self.n >= self.size:
+			self.flush()
+		elif self.latency is not None and time.monotonic() + period - self.first > self.latency:
+			# The next sample would come after the budget, don't wait for it
+			self.flush()
+
+	def poll(self, now):
+		'''Hands the batch over if its latency is up, see EmgBatcher.poll.'''
+		if not self.n or self.latency is None:
+			return None
+		left = self.first + self.latency - now
+		if left <= 0:
+			self.flush()
+			return None
+		return left
+
+	def flush(self):
+		if not self.n:
+			return
+		# from_raw makes a new array, the buffers can be reused
+		batch = from_raw(self.raw[:self.n], self.times[:self.n])
+		self.n = 0
+		self.myo.deliver(self.handler, batch)
@@ -37,13 +37,19 @@ know that any function called on Myo_Raw, may try to use the serial port,
 in windows if this is tried from a seperate thread you will get a permission error
 '''
 
+from collections import Counter, deque
 import enum
+import json
+import os
+import queue
 import re
 import struct
 import sys
 import threading
 import time
+import traceback
 
+import numpy as np
 import serial
 from serial.tools.list_ports import comports
 
@@ -54,17 +60,20 @@ def unpack(fmt, *args):
 	return struct.unpack('<' + fmt, *args)
 
 def multichr(ords):
-	if sys.version_info[0] >= 3:
-		return bytes(ords)
-	else:
-		return ''.join(map(chr, ords))
-
+	return bytes(ords)
 
 def multiord(b):
-	if sys.version_info[0] >= 3:
-		return list(b)
-	else:
-		return map(ord, b)
+	return list(b)
+
+# End of the advertising data of a Myo, the Myo's control service UUID
+MYO_SCAN_UUID = b'\x06\x42\x48\x12\x4A\x7F\x2C\x48\x47\xB9\xDE\x04\xA9\x01\x00\x06\xD5'
+
+# Precompiled layouts of the Myo's notifications
+ATTR_HEADER = struct.Struct('<BHB') # connection, attribute handle, type
+EMG_FILTERED = struct.Struct('<8HB')
+EMG_RAW = struct.Struct('<8b') # one of the two samples of a notification
+IMU = struct.Struct('<10h') # quaternion, accelerometer, gyroscope
+CLASSIFIER = struct.Struct('<6B')
 
 class emg_mode(enum.Enum):
 	NO_DATA = 0 # Do not send EMG data
@@ -95,63 +104,370 @@ class Pose(enum.Enum):
 
 
 class Packet(object):
+	'''
+	A BLED112 packet.
+	When built from a memoryview, as the Framer does, payload is a view into
+	that memory rather than a copy.
+	'''
+	__slots__ = ('typ', 'cls', 'cmd', 'payload')
+
 	def __init__(self, ords):
 		self.typ = ords[0]
 		self.cls = ords[2]
 		self.cmd = ords[3]
-		self.payload = multichr(ords[4:])
+		if isinstance(ords, memoryview):
+			self.payload = ords[4:]
+		else:
+			self.payload = bytes(ords[4:])
 
 	def __repr__(self):
 		return 'Packet(%02X, %02X, %02X, [%s])' % \
 			(self.typ, self.cls, self.cmd,
-			 ' '.join('%02X' % b for b in multiord(self.payload)))
+			 ' '.join('%02X' % b for b in self.payload))
+
+
+# First byte of a BLED112 packet: [BLE response pkt, BLE event pkt, wifi response pkt, wifi event pkt]
+PACKET_TYPES = frozenset([0x00, 0x80, 0x08, 0x88])
+# 4 byte header, 11 bit length
+MAX_PACKET_LEN = 4 + 0x7ff
+
+class Framer(object):
+	'''
+	Frames BLED112 packets out of a preallocated bytearray ring buffer.
+
+	The payload of every Packet handed out is a memoryview into the ring, so
+	framing does not copy or allocate per byte. A payload stays valid until
+	the ring wraps around, roughly size bytes later; use bytes(p.payload)
+	to keep one for longer than that. A single feed of more than capacity
+	bytes goes through the ring in several pieces, and all but the packets
+	of the last piece are handed out with their payloads copied to bytes.
+	'''
+
+	def __init__(self, size=1 << 16):
+		self.size = size
+		self.ring = bytearray(size)
+		self.view = memoryview(self.ring)
+		# ring[start:end] holds bytes that have not been framed yet
+		self.start = 0
+		self.end = 0
+		# Packets framed, and bytes skipped because they couldn't start a packet
+		self.packets = 0
+		self.skipped = 0
+
+	@property
+	def capacity(self):
+		'''Largest chunk that can be fed without overwriting packets from the same chunk.'''
+		return self.size - MAX_PACKET_LEN
+
+	def reset(self):
+		'''Drop any partially received packet.'''
+		self.start = self.end = 0
+
+	def feed(self, data):
+		'''Returns the list of packets completed by data, in order.'''
+		packets = []
+		data = memoryview(data)
+		step = self.capacity
+		for pos in range(0, len(data), step):
+			if pos:
+				# The next chunk overwrites the ring under the packets framed so far, copy them out
+				for p in packets:
+					if isinstance(p.payload, memoryview):
+						p.payload = bytes(p.payload)
+			chunk = data[pos:pos + step]
+			n = len(chunk)
+			if self.end + n > self.size:
+				self.compact()
+			self.ring[self.end:self.end + n] = chunk
+			self.end += n
+			self.frame(packets)
+		self.packets += len(packets)
+		return packets
+
+	def feed_byte(self, c):
+		'''feed for a single byte, without the allocations. Returns the packet it completes, or None.'''
+		if self.end == self.size:
+			self.compact()
+		ring = self.ring
+		ring[self.end] = c
+		self.end += 1
+		# Bytes come one at a time, start is always where the next packet begins
+		i = self.start
+		n = self.end - i
+		if n == 1:
+			if c not in PACKET_TYPES:
+				self.start += 1
+				self.skipped += 1
+			return None
+		packet_len = 4 + ((ring[i] & 0x07) << 8) + ring[i + 1]
+		if n < packet_len:
+			return None
+		self.start = i + packet_len
+		self.packets += 1
+		return Packet(self.view[i:i + packet_len])
+
+	def compact(self):
+		# Move the partial packet to the front, it is never longer than MAX_PACKET_LEN
+		partial = self.end - self.start
+		self.ring[:partial] = self.ring[self.start:self.end]
+		self.start, self.end = 0, partial
+
+	def frame(self, packets):
+		ring = self.ring
+		i = self.start
+		end = self.end
+		while i < end:
+			t = ring[i]
+			if t not in PACKET_TYPES:
+				# Skip anything that can't start a packet
+				i += 1
+				self.skipped += 1
+				continue
+			if end - i < 2:
+				break
+			# The low 3 bits of the type byte are the high bits of an 11 bit length
+			packet_len = 4 + ((t & 0x07) << 8) + ring[i + 1]
+			if end - i < packet_len:
+				break
+			packets.append(Packet(self.view[i:i + packet_len]))
+			i += packet_len
+		self.start = i
+
+
+def is_notification(p):
+	'''
+	Whether p is an attribute value event that is a notification or an
+	indication, not a read reply, which has the same class and command.
+	'''
+	# Payload: connection, attribute handle (2), attribute value type, value
+	return p.typ == 0x80 and p.cls == 4 and p.cmd == 5 and p.payload[3] in (1, 2)
+
+
+class Backpressure(enum.Enum):
+	'''
+	What BT does when it falls behind the dongle, see BT.set_backpressure.
+
+	Only whole notification and indication packets are dropped, never
+	responses, read replies or other events, so framing stays in sync, and
+	every dropped packet is counted in BT.dropped.
+	'''
+	BLOCK = 0 # Drop nothing, the backlog keeps growing while the reader is slow
+	DROP_OLDEST = 1 # Drop the oldest notifications, until the backlog is back to limit bytes
+	LATEST = 2 # Drop all but the newest keep notifications of the backlog
+
+
+class BTTimeoutError(TimeoutError):
+	'''The dongle or the Myo did not answer before the deadline.'''
 
 
 class BT(object):
 	'''Implements the non-Myo-specific details of the Bluetooth protocol.'''
-	def __init__(self, tty):
-		self.ser = serial.Serial(port=tty, baudrate=9600, dsrdtr=1)
-		self.buf = []
+	def __init__(self, tty, bulk=True, timeout=None):
+		'''
+		tty is either the name of the dongle's serial port or an already
+		opened serial-like object.
+		If bulk is True, every read drains all the bytes waiting on the port
+		and frames them in one go, instead of reading one byte per call.
+		timeout is the default deadline, in seconds, of the calls that wait for
+		an answer (send_command, wait_event, read_attr, ...). None waits forever.
+		'''
+		if hasattr(tty, 'read'):
+			self.ser = tty
+		else:
+			self.ser = serial.Serial(port=tty, baudrate=9600, dsrdtr=1)
 		self.lock = threading.Lock()
 		self.handlers = []
 
+		self.bulk = bulk
+		self.framer = Framer()
+		# Packets framed from the last chunk, not yet returned by recv_packet
+		self.pending = deque()
+
+		self.timeout = timeout
+		# Deadline every call has to meet on top of its own, see Myo.connect
+		self.outer_deadline = None
+
+		# CaptureWriter every packet is recorded to, see start_capture
+		self.capture = None
+		# time.monotonic() when the last packet returned was read
+		self.rx_time = 0.0
+		self.bytes_read = 0
+
+		self.backpressure = Backpressure.DROP_OLDEST
+		self.limit = 5096
+		self.keep = 64
+		# Notifications dropped by the backpressure policy, by (connection, attribute handle), and their size
+		self.dropped = Counter()
+		self.dropped_packets = 0
+		self.dropped_bytes = 0
+
+	def close(self):
+		self.stop_capture()
+		self.ser.close()
+
+	# capture
+	def start_capture(self, path):
+		'''
+		Records every packet sent and received, with its time, to the capture
+		file at path (appending if it exists). See pyomyo.capture.
+		'''
+		from pyomyo.capture import CaptureWriter
+		self.stop_capture()
+		self.capture = CaptureWriter(path)
+		return self.capture
+
+	def stop_capture(self):
+		capture, self.capture = self.capture, None
+		if capture is not None:
+			capture.close()
+
+	# backpressure
+	def set_backpressure(self, policy, limit=None, keep=None):
+		'''
+		Sets what happens once limit bytes or more are waiting on the port,
+		by default 5096, because the program reads slower than the Myo sends:
+		BLOCK drops nothing, DROP_OLDEST drops the oldest notifications until
+		limit bytes are left, LATEST drops all but the newest keep (64)
+		notifications. See Backpressure.
+		'''
+		self.backpressure = Backpressure(policy)
+		if limit is not None:
+			self.limit = limit
+		if keep is not None:
+			self.keep = keep
+
+	def shed(self, packets, backlog):
+		'''Drops notifications from packets, framed out of backlog bytes, as the policy says.'''
+		if self.backpressure is Backpressure.DROP_OLDEST:
+			excess = backlog - self.limit
+			allowed = len(packets)
+		else:
+			excess = float('inf')
+			allowed = sum(1 for p in packets if is_notification(p)) - self.keep
+
+		kept = []
+		for p in packets:
+			if excess > 0 and allowed > 0 and is_notification(p):
+				n = 4 + len(p.payload)
+				excess -= n
+				allowed -= 1
+				self.dropped[p.payload[0], p.payload[1] | p.payload[2] << 8] += 1
+				self.dropped_packets += 1
+				self.dropped_bytes += n
+			else:
+				kept.append(p)
+		return kept
+
+	# deadlines
+	def deadline(self, timeout=None):
+		'''The monotonic time a call given timeout has to finish by, None for never.'''
+		if timeout is None:
+			timeout = self.timeout
+		deadline = None if timeout is None else time.monotonic() + timeout
+		if self.outer_deadline is not None and (deadline is None or self.outer_deadline < deadline):
+			deadline = self.outer_deadline
+		return deadline
+
+	def remaining(self, deadline):
+		'''Seconds left until deadline, raises BTTimeoutError once it has passed.'''
+		if deadline is None:
+			return None
+		left = deadline - time.monotonic()
+		if left <= 0:
+			raise BTTimeoutError('no answer from the dongle in time')
+		return left
+
+	def recv_packet_by(self, deadline):
+		'''recv_packet, giving up at deadline. Returns None if the port timed out first.'''
+		left = self.remaining(deadline)
+		if left is None or self.pending:
+			return self.recv_packet()
+		old = self.ser.timeout
+		if old is not None and old <= left:
+			return self.recv_packet()
+		self.ser.timeout = left
+		try:
+			return self.recv_packet()
+		finally:
+			self.ser.timeout = old
+
 	# internal data-handling methods
 	def recv_packet(self):
-		n = self.ser.inWaiting() # Windows fix
+		if self.bulk:
+			return self.recv_packet_bulk()
+
+		if not self.pending and self.backpressure is not Backpressure.BLOCK and self.ser.inWaiting() >= self.limit:
+			# Fallen behind, catch up on the backlog in one read
+			self.pending.extend(self.read_chunk())
+		if self.pending:
+			return self.pop_pending()
 
 		while True:
 			c = self.ser.read()
 			if not c:
 				return None
 
+			self.bytes_read += 1
 			ret = self.proc_byte(ord(c))
 			if ret:
+				self.rx_time = time.monotonic()
+				if self.capture is not None:
+					self.capture.write(ret)
 				if ret.typ == 0x80:
 					self.handle_event(ret)
-					# Windows fix
-					if n >= 5096:
-						print("Clearning",n)
-						self.ser.flushInput()
-					# End of Windows fix
 				return ret
 
-	def proc_byte(self, c):
-		if not self.buf:
-			if c in [0x00, 0x80, 0x08, 0x88]:  # [BLE response pkt, BLE event pkt, wifi response pkt, wifi event pkt]
-				self.buf.append(c)
-			return None
-		elif len(self.buf) == 1:
-			self.buf.append(c)
-			self.packet_len = 4 + (self.buf[0] & 0x07) + self.buf[1]
-			return None
-		else:
-			self.buf.append(c)
+	def recv_packet_bulk(self):
+		'''
+		Same as recv_packet, but reads everything waiting on the port at once.
+		Packets framed from a chunk are queued and returned one per call, in
+		the order they arrived.
+		'''
+		while not self.pending:
+			read = self.bytes_read
+			packets = self.read_chunk()
+			if not packets and self.bytes_read == read:
+				# The port timed out
+				return None
+			self.pending.extend(packets)
+		return self.pop_pending()
 
-		if self.packet_len and len(self.buf) == self.packet_len:
-			p = Packet(self.buf)
-			self.buf = []
-			return p
-		return None
+	def pop_pending(self):
+		ret = self.pending.popleft()
+		if ret.typ == 0x80:
+			self.handle_event(ret)
+		return ret
+
+	def read_chunk(self):
+		'''
+		Reads everything waiting on the port, or a byte if nothing is, and
+		returns the packets it completes, less those dropped by the
+		backpressure policy. Returns an empty list if the port timed out.
+		'''
+		waiting = self.ser.inWaiting()
+		data = self.ser.read(min(waiting, self.framer.capacity) or 1)
+		if not data:
+			return []
+		packets = self.frame_chunk(data)
+		if waiting >= self.limit and self.backpressure is not Backpressure.BLOCK:
+			packets = self.shed(packets, waiting)
+		return packets
+
+	def frame_chunk(self, data):
+		'''Frames a chunk just read from the port, returns its packets.'''
+		self.rx_time = time.monotonic()
+		self.bytes_read += len(data)
+		packets = self.framer.feed(data)
+		if self.capture is not None:
+			self.capture.write_packets(packets)
+		return packets
+
+	def proc_bytes(self, data):
+		'''Frames every complete packet in data, keeping any trailing partial packet.'''
+		return self.framer.feed(data)
+
+	def proc_byte(self, c):
+		return self.framer.feed_byte(c)
 
 	def handle_event(self, p):
 		for h in self.handlers:
@@ -166,66 +482,409 @@ class BT(object):
 		except ValueError:
 			pass
 
-	def wait_event(self, cls, cmd):
+	def wait_event(self, cls, cmd, timeout=None, match=None):
+		'''
+		Waits for a (cls, cmd) event for which match(p) is true, if given.
+		Raises BTTimeoutError if none comes within timeout.
+		'''
+		deadline = self.deadline(timeout)
 		res = [None]
 
 		def h(p):
-			if p.cls == cls and p.cmd == cmd:
+			if p.cls == cls and p.cmd == cmd and res[0] is None and (match is None or match(p)):
 				res[0] = p
 		self.add_handler(h)
-		while res[0] is None:
-			self.recv_packet()
-		self.remove_handler(h)
+		try:
+			while res[0] is None:
+				self.recv_packet_by(deadline)
+		finally:
+			self.remove_handler(h)
 		return res[0]
 
 	# specific BLE commands
-	def connect(self, addr):
-		return self.send_command(6, 3, pack('6sBHHHH', multichr(addr), 0, 6, 6, 64, 0))
+	def connect(self, addr, timeout=None):
+		return self.send_command(6, 3, pack('6sBHHHH', multichr(addr), 0, 6, 6, 64, 0), timeout=timeout)
 
-	def get_connections(self):
-		return self.send_command(0, 6)
+	def get_connections(self, timeout=None):
+		return self.send_command(0, 6, timeout=timeout)
 
-	def discover(self):
-		return self.send_command(6, 2, b'\x01')
+	def discover(self, timeout=None):
+		return self.send_command(6, 2, b'\x01', timeout=timeout)
 
-	def end_scan(self):
-		return self.send_command(6, 4)
+	def end_scan(self, timeout=None):
+		return self.send_command(6, 4, timeout=timeout)
 
-	def disconnect(self, h):
-		return self.send_command(3, 0, pack('B', h))
+	def disconnect(self, h, timeout=None):
+		return self.send_command(3, 0, pack('B', h), timeout=timeout)
 
-	def read_attr(self, con, attr):
-		self.send_command(4, 4, pack('BH', con, attr))
-		return self.wait_event(4, 5)
+	def read_attr(self, con, attr, timeout=None):
+		deadline = self.deadline(timeout)
+		self.send_command(4, 4, pack('BH', con, attr), timeout=self.remaining(deadline))
+		# Skip notifications, from this or other connections, that arrive meanwhile
+		return self.wait_event(4, 5, timeout=self.remaining(deadline),
+			match=lambda p: ATTR_HEADER.unpack_from(p.payload)[:2] == (con, attr))
 
-	def write_attr(self, con, attr, val):
-		self.send_command(4, 5, pack('BHB', con, attr, len(val)) + val)
-		return self.wait_event(4, 1)
+	def write_attr(self, con, attr, val, timeout=None):
+		deadline = self.deadline(timeout)
+		self.send_command(4, 5, pack('BHB', con, attr, len(val)) + val, timeout=self.remaining(deadline))
+		return self.wait_event(4, 1, timeout=self.remaining(deadline), match=lambda p: p.payload[0] == con)
 
-	def send_command(self, cls, cmd, payload=b'', wait_resp=True):
+	def write_command(self, con, attr, val, timeout=None):
+		'''
+		Writes without response: only the dongle acknowledges, the write goes
+		out with the next connection event without a GATT procedure to wait for.
+		'''
+		return self.send_command(4, 6, pack('BHB', con, attr, len(val)) + val, timeout=timeout)
+
+	def write_attrs(self, con, writes, unacknowledged=(), timeout=None):
+		'''
+		Writes [(attr, value)] in order. Attributes in unacknowledged are
+		written without response, so they don't wait for the Myo, the others
+		one GATT procedure at a time, as BLE allows. timeout is per write.
+		'''
+		for attr, val in writes:
+			if attr in unacknowledged:
+				self.write_command(con, attr, val, timeout)
+			else:
+				self.write_attr(con, attr, val, timeout)
+
+	def send_command(self, cls, cmd, payload=b'', wait_resp=True, timeout=None):
+		'''Sends a command and returns its response, raises BTTimeoutError if none comes within timeout.'''
+		deadline = self.deadline(timeout)
 		s = pack('4B', 0, len(payload), cls, cmd) + payload
 		self.ser.write(s)
+		if self.capture is not None:
+			self.capture.write_raw(s[:4], s[4:], direction=1) # TX
 
 		while True:
-			p = self.recv_packet()
-			# no timeout, so p won't be None
+			p = self.recv_packet_by(deadline)
+			if p is None:
+				# The port timed out, keep waiting for the response
+				continue
 			if p.typ == 0:
 				return p
-			# not a response: must be an event
-			self.handle_event(p)
+			# not a response: must be an event, recv_packet already handled BLE events
+			if p.typ != 0x80:
+				self.handle_event(p)
+
+
+class EmgBatcher(object):
+	'''Copies EMG samples into (n, 8) arrays for a batch handler, see Myo.add_emg_batch_handler.'''
+
+	def __init__(self, myo, handler, size, latency, timestamps=False):
+		self.myo = myo
+		self.handler = handler
+		self.size = size
+		self.latency = latency
+		self.buf = None
+		# A notification carries at most two samples
+		self.times = np.empty(size + 2) if timestamps else None
+		self.n = 0
+		self.first = 0.0
+
+	def push(self, samples, t=0.0, period=0.0):
+		'''Adds samples, the first taken at time t and the others period apart.'''
+		if self.buf is None or self.buf.dtype != samples.dtype:
+			# First sample, or the EMG mode changed
+			self.flush()
+			self.buf = np.empty((self.size + 2, 8), dtype=samples.dtype)
+		if self.n == 0 and self.latency is not None:
+			self.first = time.monotonic()
+
+		k = len(samples)
+		self.buf[self.n:self.n + k] = samples
+		if self.times is not None:
+			for i in range(k):
+				self.times[self.n + i] = t + i * period
+		self.n += k
+		if self.n >= self.size:
+			self.flush()
+		elif self.latency is not None and time.monotonic() + k * period - self.first > self.latency:
+			# The next notification, k samples later, would come after the budget, don't wait for it
+			self.flush()
+
+	def poll(self, now):
+		'''
+		Hands the batch over if its latency is up, even though no sample came
+		since. Returns the seconds until it is due, None if nothing is waiting.
+		'''
+		if not self.n or self.latency is None:
+			return None
+		left = self.first + self.latency - now
+		if left <= 0:
+			self.flush()
+			return None
+		return left
+
+	def flush(self):
+		if not self.n:
+			return
+		batch = self.buf[:self.n]
+		self.buf = np.empty_like(self.buf)
+		if self.times is not None:
+			times = self.times[:self.n]
+			self.times = np.empty_like(self.times)
+			self.n = 0
+			self.myo.deliver(self.handler, batch, times)
+			return
+		self.n = 0
+		self.myo.deliver(self.handler, batch)
+
+
+# The four raw EMG characteristics, in the order the Myo sends them
+EMG_ATTRS = (0x2b, 0x2e, 0x31, 0x34)
+# Nominal sample rates, Hz, of the raw EMG characteristics and the filtered one
+EMG_RATE = 200.0
+EMG_FILTERED_RATE = 50.0
+# Names of the notifying characteristics in Myo.stats, and the samples in one notification
+ATTR_NAMES = {0x27: 'emg', 0x2b: 'emg0', 0x2e: 'emg1', 0x31: 'emg2', 0x34: 'emg3',
+	0x1c: 'imu', 0x23: 'classifier', 0x11: 'battery'}
+SAMPLES_PER_NOTIFICATION = {0x2b: 2, 0x2e: 2, 0x31: 2, 0x34: 2}
+# Sliding windows of the rates in Myo.stats, in seconds
+RATE_WINDOWS = (1, 5, 30)
+
+class SampleClock(object):
+	'''
+	Reconstructs the time of every EMG sample.
+
+	The Myo doesn't timestamp its samples, so they are placed on a regular
+	grid of period seconds. The grid is pulled down to the earliest packet
+	arrivals (a sample can't be taken after it arrived) and crept up slowly
+	otherwise. Its period starts at the nominal rate and is corrected by the
+	rate measured over the whole stream, within max_drift of nominal.
+
+	Packets come round-robin from the characteristics in order, each holding
+	per_packet samples. A characteristic skipped in that order is counted as
+	lost samples, and the grid moves on past them. Late packets alone are
+	not, a reader that stalls looks just the same, but packets known to be
+	dropped are passed to update as skipped.
+	'''
+
+	def __init__(self, rate, order, per_packet, window=5.0, gain=0.01, max_drift=0.02):
+		self.rate = rate
+		self.order = order
+		self.per_packet = per_packet
+		self.window = window
+		self.gain = gain
+		self.max_drift = max_drift
+
+		self.nominal = 1.0 / rate
+		self.period = self.nominal
+		self.position = {attr: i for i, attr in enumerate(order)}
+		self.expected = None
+		# Time of the last sample placed, and samples placed so far, lost ones included
+		self.last = None
+		self.n = 0
+		self.first_arrival = None
+
+		self.samples = 0
+		self.gaps = 0
+		self.lost = 0
+		# (arrival, samples received, samples lost) of the packets in the last window seconds,
+		# bounded for replays that deliver faster than real time
+		self.recent = deque(maxlen=int(window * rate))
+
+	@classmethod
+	def for_attr(cls, attr, **kwargs):
+		'''The clock for the EMG characteristic attr: 200 Hz raw or 50 Hz filtered.'''
+		if attr in EMG_ATTRS:
+			return cls(EMG_RATE, EMG_ATTRS, 2, **kwargs)
+		return cls(EMG_FILTERED_RATE, (attr,), 1, **kwargs)
+
+	def update(self, arrival, attr, skipped=0):
+		'''
+		Places the samples of a packet from attr that arrived at arrival,
+		after skipped packets of the stream that are known to be dropped.
+		Returns the time of its first sample.
+		'''
+		k = self.per_packet
+		period = self.period
+		missed = skipped
+		if self.last is None:
+			self.first_arrival = arrival
+			last = arrival
+		else:
+			missed += (self.position[attr] - self.position[self.expected] - skipped) % len(self.order)
+			last = self.last + (missed + 1) * k * period
+			late = arrival - last
+			if late < 0:
+				last = arrival
+			else:
+				# At most a round of packets, so a backlog read all at once doesn't drag the grid
+				last += self.gain * min(late, len(self.order) * k * period)
+
+		self.last = last
+		self.n += (missed + 1) * k
+		self.expected = self.order[(self.position[attr] + 1) % len(self.order)]
+		self.samples += k
+		if missed:
+			self.gaps += 1
+			self.lost += missed * k
+
+		span = arrival - self.first_arrival
+		if span > 2.0:
+			period = span / (self.n - k)
+			self.period = min(max(period, self.nominal * (1 - self.max_drift)), self.nominal * (1 + self.max_drift))
+
+		recent = self.recent
+		recent.append((arrival, k, missed * k))
+		while recent[0][0] < arrival - self.window:
+			recent.popleft()
+		return last - (k - 1) * self.period
+
+	def stats(self):
+		'''
+		Rolling statistics over the last window seconds: sample rate, mean and
+		standard deviation (jitter) of the time between packets, the longest
+		time between packets, and the gaps and lost samples, in the window and
+		since the start.
+		'''
+		recent = list(self.recent)
+		received = sum(r[1] for r in recent)
+		lost = sum(r[2] for r in recent)
+		intervals = np.diff([r[0] for r in recent]) if len(recent) > 1 else np.zeros(0)
+		span = recent[-1][0] - recent[0][0] if len(recent) > 1 else 0.0
+		return {
+			'nominal_rate': self.rate,
+			'estimated_rate': 1.0 / self.period,
+			# the first packet of the window started it
+			'rate': (received - recent[0][1]) / span if span > 0 else 0.0,
+			'interval': float(intervals.mean()) if len(intervals) else 0.0,
+			'jitter': float(intervals.std()) if len(intervals) else 0.0,
+			'max_interval': float(intervals.max()) if len(intervals) else 0.0,
+			'window_gaps': sum(1 for r in recent if r[2]),
+			'window_lost': lost,
+			'samples': self.samples,
+			'gaps': self.gaps,
+			'lost': self.lost,
+		}
+
+
+# Where Myo(cache=True) keeps the last Myo connected to
+DEFAULT_CACHE = os.path.join(os.path.expanduser('~'), '.pyomyo_cache.json')
+
+class DeviceCache(object):
+	'''
+	The address and firmware of the last Myo connected to, in a small JSON
+	file, so the next connect, even from a new process, can go straight to it.
+	'''
+
+	def __init__(self, path=None):
+		self.path = path or DEFAULT_CACHE
+
+	def load(self):
+		'''{'addr': [6 ints], 'firmware': [4 ints], 'old': bool}, or None if there is nothing usable.'''
+		try:
+			with open(self.path) as f:
+				entry = json.load(f)
+			addr = [int(b) for b in entry['addr']]
+			firmware = [int(v) for v in entry['firmware']]
+			old = bool(entry['old'])
+		except (OSError, ValueError, KeyError, TypeError):
+			return None
+		if len(addr) != 6 or len(firmware) != 4:
+			return None
+		return {'addr': addr, 'firmware': firmware, 'old': old}
+
+	def save(self, addr, firmware, old):
+		entry = {'addr': list(addr), 'firmware': list(firmware), 'old': bool(old)}
+		if self.load() == entry:
+			return
+		tmp = self.path + '.tmp'
+		try:
+			with open(tmp, 'w') as f:
+				json.dump(entry, f)
+			os.replace(tmp, self.path)
+		except OSError as e:
+			# Only a cache, connecting worked anyway
+			print('could not save the Myo cache:', e)
+
+	def clear(self):
+		try:
+			os.remove(self.path)
+		except FileNotFoundError:
+			pass
+
+
+# Values of a client characteristic configuration descriptor
+NOTIFY = b'\x01\x00'
+INDICATE = b'\x02\x00'
+# The Myo's command characteristic, and the commands that set a mode rather
+# than do something once: set EMG, IMU and classifier modes, set sensor
+# parameters (old firmware), set sleep mode
+COMMAND = 0x19
+MODE_COMMANDS = (0x01, 0x02, 0x09)
+
+# Subscriptions to the four raw EMG characteristics, EmgData0..3Characteristic
+EMG_RAW_SUBSCRIBE = [(0x2c, NOTIFY), (0x2f, NOTIFY), (0x32, NOTIFY), (0x35, NOTIFY)]
+
+# The attribute writes that start each EMG mode, see Myo.start_filtered and friends.
+# The command is struct.pack('<5B', 1, 3, emg_mode, imu_mode, classifier_mode). It
+# goes first, so the samples start with the first subscription instead of the last.
+EMG_MODE_WRITES = {
+	emg_mode.PREPROCESSED: [(COMMAND, b'\x01\x03\x01\x01\x00'), (0x28, NOTIFY)],
+	emg_mode.FILTERED: [(COMMAND, b'\x01\x03\x02\x01\x01')] + EMG_RAW_SUBSCRIBE,
+	emg_mode.RAW: [(COMMAND, b'\x01\x03\x03\x01\x00')] + EMG_RAW_SUBSCRIBE,
+}
+
+def dedupe_writes(writes):
+	'''
+	[(attr, value)] without the writes that leave the Myo as it already is:
+	a descriptor written the value it was last written, or a mode command
+	repeated with the same arguments. Other commands, vibrate, LEDs and so
+	on, are always kept.
+	'''
+	last = {}
+	out = []
+	for attr, val in writes:
+		val = bytes(val)
+		if attr != COMMAND:
+			key = attr
+		elif val[:1] and val[0] in MODE_COMMANDS:
+			key = (attr, val[0])
+		else:
+			key = None
+		if key is not None:
+			if last.get(key) == val:
+				continue
+			last[key] = val
+		out.append((attr, val))
+	return out
 
 
 class Myo(object):
 	'''Implements the Myo-specific communication protocol.'''
 
-	def __init__(self, tty=None, mode=1):
-		if tty is None:
-			tty = self.detect_tty()
-		if tty is None:
-			raise ValueError('Myo dongle not found!')
-
-		self.bt = BT(tty)
+	def __init__(self, tty=None, mode=1, bulk=True, timeout=None, bt=None, cache=None, pipeline=False):
+		'''
+		bt shares an already open dongle between several Myos, tty is then ignored.
+		cache is True or the path of a DeviceCache file, to reconnect to the
+		last Myo without scanning, see connect.
+		pipeline sends commands to the Myo without waiting for it to
+		acknowledge each one, see write_attrs.
+		'''
+		if bt is None:
+			if tty is None:
+				tty = self.detect_tty()
+			if tty is None:
+				raise ValueError('Myo dongle not found!')
+			bt = BT(tty, bulk=bulk, timeout=timeout)
+
+		self.bt = bt
 		self.conn = None
+		self.addr = None
+		self.firmware = None
+		if cache is True:
+			cache = DeviceCache()
+		elif isinstance(cache, str):
+			cache = DeviceCache(cache)
+		self.cache = cache or None
+		# How long to try the cached address before scanning
+		self.direct_timeout = 2.0
+		self.pipeline = pipeline
+		# When connect() was called, and seconds from then to the first EMG sample, see stats
+		self.connect_started = None
+		self.time_to_first_emg = None
 		self.emg_handlers = []
 		self.imu_handlers = []
 		self.arm_handlers = []
@@ -233,7 +892,54 @@ class Myo(object):
 		self.battery_handlers = []
 		self.mode = mode
 
-	def detect_tty(self):
+		# Notification attribute handle -> decode function, called with the
+		# whole payload of the notification, its value from offset 5 on. See register_decoder
+		self.decoders = {
+			0x27: self.decode_emg_filtered,
+			# The four EMG characteristics
+			0x2b: self.decode_emg_raw,
+			0x2e: self.decode_emg_raw,
+			0x31: self.decode_emg_raw,
+			0x34: self.decode_emg_raw,
+			0x1c: self.decode_imu,
+			0x23: self.decode_classifier,
+			0x11: self.decode_battery,
+		}
+		# Notifications from handles without a decoder, by handle
+		self.unknown_attrs = Counter()
+		# Decoded notifications by handle, and (time, copy of it) every half second for the rates.
+		# A plain dict with every handle in it, cheaper to count in than a Counter
+		self.notifications = dict.fromkeys(self.decoders, 0)
+		self.marks = deque(maxlen=2 * max(RATE_WINDOWS) + 2)
+		self.next_mark = 0.0
+		self.emg_batchers = []
+		self.timed_emg_handlers = []
+		# SampleClock of the EMG stream, run only once emg_timed, see emg_time
+		self.emg_clock = None
+		self.emg_timed = False
+		# BT.dropped_packets, and EMG notifications of ours among them, when last looked at
+		self.dropped_seen = 0
+		self.emg_dropped = 0
+		# ImuBatchers, and the SampleClock and dropped notifications of the IMU stream, see imu_time
+		self.imu_batchers = []
+		self.imu_clock = None
+		self.imu_dropped = 0
+
+		# Background reading, see start()
+		self.queueing = False
+		self.reader = None
+		self.dispatcher = None
+		self.samples = None
+		self.commands = None
+		self.stopping = threading.Event()
+		# What ended the reader thread, raised again by stop()
+		self.reader_error = None
+		self.queue_drops = 0
+		self.queue_overflows = 0
+		self.overflowing = False
+
+	@staticmethod
+	def detect_tty():
 		for p in comports():
 			if re.search(r'PID=2458:0*1', p[2]):
 				print('using device:', p[0])
@@ -242,166 +948,611 @@ class Myo(object):
 		return None
 
 	def run(self):
-		self.bt.recv_packet()
+		due = self.poll_batches()
+		if due is None:
+			self.bt.recv_packet()
+		else:
+			# Don't block past the time the waiting batch is due, the port times out often enough, see poll_port
+			deadline = time.monotonic() + due
+			while self.bt.recv_packet() is None and time.monotonic() < deadline:
+				pass
+			self.poll_batches()
 
-	def connect(self, addr=None):
+	def poll_batches(self):
+		'''
+		Hands over the batches whose latency is up, see add_emg_batch_handler.
+		Returns the seconds until the next one is due, None if none is waiting.
+		'''
+		if not self.emg_batchers and not self.imu_batchers:
+			return None
+		now = time.monotonic()
+		due = None
+		for b in self.emg_batchers + self.imu_batchers:
+			left = b.poll(now)
+			if left is not None and (due is None or left < due):
+				due = left
+		return due
+
+	def start(self, queue_size=1024, poll=0.01):
+		'''
+		Opt-in alternative to calling run() in a loop.
+		A reader thread owns the serial port: it frames and decodes packets and
+		pushes the decoded samples into a bounded queue. A dispatcher thread
+		takes them off the queue and calls the handlers, so a slow handler no
+		longer stalls the serial port.
+
+		When the queue is full the oldest sample is dropped, queue_drops counts
+		dropped samples and queue_overflows the number of times the queue
+		filled up. Calls that talk to the Myo (write_attr, vibrate, ...) can be
+		made from any thread, they are run on the reader thread.
+
+		If reading fails, e.g. the dongle is unplugged, the threads end, calls
+		raise the error and so does stop().
+		'''
+		if self.reader is not None:
+			return
+		self.samples = queue.Queue(queue_size)
+		self.commands = queue.Queue()
+		self.stopping.clear()
+		self.reader_error = None
+		self.saved_timeout = self.bt.ser.timeout
+		# Don't block on the port forever, so commands and stop() get a look in
+		self.bt.ser.timeout = poll
+
+		self.dispatcher = threading.Thread(target=self.dispatch_loop, name='pyomyo-dispatch', daemon=True)
+		self.dispatcher.start()
+		self.queueing = True
+		self.reader = threading.Thread(target=self.read_loop, name='pyomyo-reader', daemon=True)
+		self.reader.start()
+
+	def stop(self):
+		'''Stops the threads started by start(), after the queued samples are handled.'''
+		if self.reader is None:
+			return
+		self.stopping.set()
+		if self.reader is not threading.current_thread():
+			self.reader.join()
+		error = self.reader_error
+		if error is not None:
+			# The dispatcher has ended, what's left is handled here
+			self.queueing = False
+		self.flush_emg_batches()
+		self.flush_imu_batches()
+		self.bt.ser.timeout = self.saved_timeout
+		self.queueing = False
+		if error is None:
+			self.samples.put(None)
+		if self.dispatcher is not threading.current_thread():
+			self.dispatcher.join()
+		self.reader = None
+		self.dispatcher = None
+		if error is not None:
+			self.reader_error = None
+			raise error
+
+	def read_loop(self):
+		try:
+			while not self.stopping.is_set():
+				self.run_commands()
+				self.bt.recv_packet()
+				self.poll_batches()
+			self.run_commands()
+		except Exception as e:
+			# Nothing more will come from the port
+			self.reader_error = e
+			self.stopping.set()
+			self.fail_commands(e)
+			# Ends the dispatcher once the samples before it are handled
+			self.samples.put(None)
+
+	def run_commands(self):
+		while True:
+			try:
+				fn, args, done, box = self.commands.get_nowait()
+			except queue.Empty:
+				return
+			try:
+				box['result'] = fn(*args)
+			except Exception as e:
+				box['error'] = e
+			done.set()
+
+	def fail_commands(self, error):
+		while True:
+			try:
+				fn, args, done, box = self.commands.get_nowait()
+			except queue.Empty:
+				return
+			box['error'] = error
+			done.set()
+
+	def dispatch_loop(self):
+		while True:
+			item = self.samples.get()
+			if item is None:
+				return
+			fn, args = item
+			try:
+				fn(*args)
+			except Exception:
+				traceback.print_exc()
+
+	def call(self, fn, *args):
+		'''Runs fn on the thread that owns the serial port and returns its result.'''
+		reader = self.reader
+		if reader is None or reader is threading.current_thread():
+			return fn(*args)
+		if self.reader_error is not None:
+			raise self.reader_error
+		done = threading.Event()
+		box = {}
+		self.commands.put((fn, args, done, box))
+		while not done.wait(0.1):
+			# Queued after the reader ran its last commands
+			if not reader.is_alive():
+				self.fail_commands(self.reader_error or RuntimeError('the reader thread has stopped'))
+		if 'error' in box:
+			raise box['error']
+		return box.get('result')
+
+	def deliver(self, fn, *args):
+		'''Calls fn, or once start()ed queues the call for the dispatcher thread.'''
+		if self.queueing:
+			self.deliver_queued(fn, *args)
+		else:
+			fn(*args)
+
+	def deliver_queued(self, fn, *args):
+		try:
+			self.samples.put_nowait((fn, args))
+			self.overflowing = False
+			return
+		except queue.Full:
+			pass
+
+		if not self.overflowing:
+			self.queue_overflows += 1
+			self.overflowing = True
+		# Drop the oldest sample to make room for the newest one
+		try:
+			self.samples.get_nowait()
+			self.queue_drops += 1
+		except queue.Empty:
+			pass
+		try:
+			self.samples.put_nowait((fn, args))
+		except queue.Full:
+			self.queue_drops += 1
+
+	def connect(self, addr=None, timeout=None, reset=True, exclude=()):
 		'''
 		Connect to a Myo
 		Addr is the MAC address in format: [93, 41, 55, 245, 82, 194]
+		If the whole handshake doesn't finish within timeout seconds,
+		BTTimeoutError is raised and connect can simply be called again.
+		With reset False the dongle's other connections are left alone, and
+		scanning skips the addresses in exclude, see MultiMyo.
+		With a cache, the last Myo connected to is tried directly for
+		direct_timeout seconds before scanning, and its firmware isn't read again.
 		'''
+		if self.reader is not None and self.reader is not threading.current_thread():
+			return self.call(self.connect, addr, timeout, reset, exclude)
+
+		self.connect_started = time.monotonic()
+		self.time_to_first_emg = None
+		self.bt.outer_deadline = None
+		self.bt.outer_deadline = self.bt.deadline(timeout)
+		try:
+			self.handshake(addr, reset, exclude)
+		except BTTimeoutError:
+			self.conn = None
+			raise
+		finally:
+			self.bt.outer_deadline = None
+
+	def handshake(self, addr, reset=True, exclude=()):
 		# stop everything from before
-		self.bt.end_scan()
-		self.bt.disconnect(0)
-		self.bt.disconnect(1)
-		self.bt.disconnect(2)
-
-		# start scanning
-		if (addr is None):
-			print('scanning...')
-			self.bt.discover()
-			while True:
-				p = self.bt.recv_packet()
-				print('scan response:', p)
-
-				if p.payload.endswith(b'\x06\x42\x48\x12\x4A\x7F\x2C\x48\x47\xB9\xDE\x04\xA9\x01\x00\x06\xD5'):
-					addr = list(multiord(p.payload[2:8]))
-					break
+		if reset:
 			self.bt.end_scan()
-		# connect and wait for status event
-		conn_pkt = self.bt.connect(addr)
-		self.conn = multiord(conn_pkt.payload)[-1]
-		self.bt.wait_event(3, 0)
+			self.bt.disconnect(0)
+			self.bt.disconnect(1)
+			self.bt.disconnect(2)
+
+		exclude = [list(a) for a in exclude]
+		cached = self.cache.load() if self.cache is not None else None
+		if cached is not None and (cached['addr'] in exclude or addr is not None and list(addr) != cached['addr']):
+			cached = None
+
+		if cached is not None and self.connect_direct(cached['addr'], self.direct_timeout):
+			self.firmware = tuple(cached['firmware'])
+			self.old = cached['old']
+			print('firmware version: %d.%d.%d.%d' % self.firmware)
+		else:
+			cached = None
+			# start scanning
+			if (addr is None):
+				addr = self.scan(exclude)
+			self.connect_direct(addr)
 
-		# get firmware version
-		fw = self.read_attr(0x17)
-		_, _, _, _, v0, v1, v2, v3 = unpack('BHBBHHHH', fw.payload)
-		print('firmware version: %d.%d.%d.%d' % (v0, v1, v2, v3))
+			# get firmware version
+			fw = self.read_attr(0x17)
+			_, _, _, _, v0, v1, v2, v3 = unpack('BHBBHHHH', fw.payload)
+			print('firmware version: %d.%d.%d.%d' % (v0, v1, v2, v3))
+			self.firmware = (v0, v1, v2, v3)
 
-		self.old = (v0 == 0)
+			self.old = (v0 == 0)
 
-		if self.old:
-			# don't know what these do; Myo Connect sends them, though we get data
-			# fine without them
-			self.write_attr(0x19, b'\x01\x02\x00\x00')
-			# Subscribe for notifications from 4 EMG data channels
-			self.write_attr(0x2f, b'\x01\x00')
-			self.write_attr(0x2c, b'\x01\x00')
-			self.write_attr(0x32, b'\x01\x00')
-			self.write_attr(0x35, b'\x01\x00')
-
-			# enable EMG data
-			self.write_attr(0x28, b'\x01\x00')
-			# enable IMU data
-			self.write_attr(0x1d, b'\x01\x00')
+			if not self.old:
+				name = self.read_attr(0x03)
+				print('device name: %s' % bytes(name.payload))
 
-			# Sampling rate of the underlying EMG sensor, capped to 1000. If it's
-			# less than 1000, emg_hz is correct. If it is greater, the actual
-			# framerate starts dropping inversely. Also, if this is much less than
-			# 1000, EMG data becomes slower to respond to changes. In conclusion,
-			# 1000 is probably a good value.f
-			C = 1000
-			emg_hz = 50
-			# strength of low-pass filtering of EMG data
-			emg_smooth = 100
+		# add data handlers, before configuring so the first samples aren't missed
+		self.bt.remove_handler(self.handle_data)
+		self.bt.add_handler(self.handle_data)
 
-			imu_hz = 50
+		self.configure()
 
-			# send sensor parameters, or we don't get any data
-			self.write_attr(0x19, pack('BBBBHBBBBB', 2, 9, 2, 1, C, emg_smooth, C // emg_hz, imu_hz, 0, 0))
+		if self.cache is not None:
+			self.cache.save(self.addr, self.firmware, self.old)
 
-		else:
-			name = self.read_attr(0x03)
-			print('device name: %s' % name.payload)
+	def scan(self, exclude=()):
+		'''Scans until a Myo whose address isn't in exclude shows up, returns its address.'''
+		print('scanning...')
+		self.bt.discover()
+		while True:
+			p = self.bt.recv_packet_by(self.bt.outer_deadline)
+			if p is None:
+				continue
+			print('scan response:', p)
+
+			if bytes(p.payload).endswith(MYO_SCAN_UUID) and list(p.payload[2:8]) not in exclude:
+				addr = list(p.payload[2:8])
+				break
+		self.bt.end_scan()
+		return addr
 
-			# enable IMU data
-			self.write_attr(0x1d, b'\x01\x00')
-			# enable on/off arm notifications
-			self.write_attr(0x24, b'\x02\x00')
-			# enable EMG notifications
+	def connect_direct(self, addr, timeout=None):
+		'''
+		Connects to addr and waits for the connection to be up. If it isn't
+		within timeout seconds, the attempt is cancelled and False returned.
+		'''
+		conn_pkt = self.bt.connect(addr)
+		conn = conn_pkt.payload[-1]
+		try:
+			self.bt.wait_event(3, 0, timeout, match=lambda p: p.payload[0] == conn)
+		except BTTimeoutError:
+			outer = self.bt.outer_deadline
+			if timeout is None or (outer is not None and time.monotonic() >= outer):
+				raise
+			# Not around, stop trying
+			self.bt.end_scan()
+			return False
+		self.conn = conn
+		self.addr = list(addr)
+		return True
+
+	def configure(self):
+		'''Subscribes to the notifications for the current mode, once connected.'''
+		if not self.old:
 			if (self.mode == emg_mode.PREPROCESSED):
 				# Send the undocumented filtered 50Hz.
 				print("Starting filtered, 0x01")
-				self.start_filtered() # 0x01
 			elif (self.mode == emg_mode.FILTERED):
 				print("Starting raw filtered, 0x02")
-				self.start_raw() # 0x02
 			elif (self.mode == emg_mode.RAW):
 				print("Starting raw, unfiltered, 0x03")
-				self.start_raw_unfiltered() #0x03
 			else:
 				print("No EMG mode selected, not sending EMG data")
-			# Stop the Myo Disconnecting
-			self.sleep_mode(1)
+		self.write_attrs(self.setup_writes())
 
-			# enable battery notifications
-			self.write_attr(0x12, b'\x01\x10')
+	def setup_writes(self):
+		'''The attribute writes configure sends, [(attr, value)] in order.'''
+		if self.old:
+			# Sampling rate of the underlying EMG sensor, capped to 1000. If it's
+			# less than 1000, emg_hz is correct. If it is greater, the actual
+			# framerate starts dropping inversely. Also, if this is much less than
+			# 1000, EMG data becomes slower to respond to changes. In conclusion,
+			# 1000 is probably a good value.f
+			C = 1000
+			emg_hz = 50
+			# strength of low-pass filtering of EMG data
+			emg_smooth = 100
 
-		# add data handlers
-		def handle_data(p):
-			if (p.cls, p.cmd) != (4, 5):
-				return
+			imu_hz = 50
 
-			c, attr, typ = unpack('BHB', p.payload[:4])
-			pay = p.payload[5:]
-
-			if attr == 0x27:
-				# Unpack a 17 byte array, first 16 are 8 unsigned shorts, last one an unsigned char
-				vals = unpack('8HB', pay)
-				# not entirely sure what the last byte is, but it's a bitmask that
-				# seems to indicate which sensors think they're being moved around or
-				# something
-				emg = vals[:8]
-				moving = vals[8]
-				self.on_emg(emg, moving)
-			# Read notification handles corresponding to the for EMG characteristics
-			elif attr == 0x2b or attr == 0x2e or attr == 0x31 or attr == 0x34:
-				'''According to http://developerblog.myo.com/myocraft-emg-in-the-bluetooth-protocol/
-				each characteristic sends two secuential readings in each update,
-				so the received payload is split in two samples. According to the
-				Myo BLE specification, the data type of the EMG samples is int8_t.
-				'''
-				emg1 = struct.unpack('<8b', pay[:8])
-				emg2 = struct.unpack('<8b', pay[8:])
-				self.on_emg(emg1, 0)
-				self.on_emg(emg2, 0)
-			# Read IMU characteristic handle
-			elif attr == 0x1c:
-				vals = unpack('10h', pay)
-				quat = vals[:4]
-				acc = vals[4:7]
-				gyro = vals[7:10]
-				self.on_imu(quat, acc, gyro)
-			# Read classifier characteristic handle
-			elif attr == 0x23:
-				typ, val, xdir, _, _, _ = unpack('6B', pay)
-
-				if typ == 1:  # on arm
-					self.on_arm(Arm(val), XDirection(xdir))
-				elif typ == 2:  # removed from arm
-					self.on_arm(Arm.UNKNOWN, XDirection.UNKNOWN)
-				elif typ == 3:  # pose
-					self.on_pose(Pose(val))
-			# Read battery characteristic handle
-			elif attr == 0x11:
-				battery_level = ord(pay)
-				self.on_battery(battery_level)
+			return [
+				# don't know what these do; Myo Connect sends them, though we get data
+				# fine without them
+				(COMMAND, b'\x01\x02\x00\x00'),
+				# Subscribe for notifications from 4 EMG data channels
+				(0x2f, NOTIFY),
+				(0x2c, NOTIFY),
+				(0x32, NOTIFY),
+				(0x35, NOTIFY),
+				# enable EMG data
+				(0x28, NOTIFY),
+				# enable IMU data
+				(0x1d, NOTIFY),
+				# send sensor parameters, or we don't get any data
+				(COMMAND, pack('BBBBHBBBBB', 2, 9, 2, 1, C, emg_smooth, C // emg_hz, imu_hz, 0, 0)),
+			]
+
+		# EMG first, so it streams while the rest is set up
+		return EMG_MODE_WRITES.get(self.mode, []) + [
+			# enable IMU data
+			(0x1d, NOTIFY),
+			# enable on/off arm notifications
+			(0x24, INDICATE),
+			# Stop the Myo Disconnecting
+			(COMMAND, pack('3B', 9, 1, 1)),
+			# enable battery notifications
+			(0x12, b'\x01\x10'),
+		]
+
+	def handle_data(self, p):
+		if p.cls != 4 or p.cmd != 5:
+			return
+
+		payload = p.payload
+		c, attr, typ = ATTR_HEADER.unpack_from(payload)
+		if c != self.conn:
+			# Another Myo on the same dongle
+			return
+		decode = self.decoders.get(attr)
+		if decode is None:
+			self.unknown_attrs[attr] += 1
+			return
+		self.notifications[attr] += 1
+		if self.bt.rx_time >= self.next_mark:
+			self.next_mark = self.bt.rx_time + 0.5
+			self.marks.append((self.bt.rx_time, dict(self.notifications)))
+		decode(payload)
+
+	def register_decoder(self, attr, fmt, decode):
+		'''
+		Decode notifications from attribute handle attr.
+		fmt is a struct format (little endian unless it says otherwise) or a
+		struct.Struct, decode is then called with the unpacked tuple. With fmt
+		None decode gets the raw value instead.
+		'''
+		if isinstance(fmt, str):
+			fmt = struct.Struct(fmt if fmt[:1] in '@=<>!' else '<' + fmt)
+		if fmt is None:
+			def decode_value(payload):
+				decode(payload[5:])
+		else:
+			unpack = fmt.unpack_from
+			def decode_value(payload):
+				decode(unpack(payload, 5))
+		self.decoders[attr] = decode_value
+		self.notifications.setdefault(attr, 0)
+
+	def decode_emg_filtered(self, payload):
+		# 8 unsigned shorts, then an unsigned char.
+		# not entirely sure what the last byte is, but it's a bitmask that
+		# seems to indicate which sensors think they're being moved around or
+		# something
+		t = self.emg_time(0x27) if self.emg_timed or self.time_to_first_emg is None else 0.0
+		if self.emg_handlers or self.timed_emg_handlers:
+			vals = EMG_FILTERED.unpack_from(payload, 5)
+			emg, moving = vals[:8], vals[8]
+			if self.queueing:
+				if self.emg_handlers:
+					self.deliver_queued(self.on_emg, emg, moving)
+				if self.timed_emg_handlers:
+					self.deliver_queued(self.on_timed_emg, t, emg, moving)
 			else:
-				print('data with unknown attr: %02X %s' % (attr, p))
-
-		self.bt.add_handler(handle_data)
+				for h in self.emg_handlers:
+					h(emg, moving)
+				for h in self.timed_emg_handlers:
+					h(t, emg, moving)
+		if self.emg_batchers:
+			samples = np.frombuffer(payload, dtype='<u2', count=8, offset=5).reshape(1, 8)
+			period = self.emg_clock.period if self.emg_timed else 1.0 / EMG_FILTERED_RATE
+			for b in self.emg_batchers:
+				b.push(samples, t, period)
+
+	def decode_emg_raw(self, payload):
+		'''According to http://developerblog.myo.com/myocraft-emg-in-the-bluetooth-protocol/
+		each characteristic sends two secuential readings in each update,
+		so the received payload is split in two samples. According to the
+		Myo BLE specification, the data type of the EMG samples is int8_t.
+		'''
+		if self.emg_timed or self.time_to_first_emg is None:
+			t = self.emg_time(ATTR_HEADER.unpack_from(payload)[1])
+		else:
+			t = 0.0
+		if self.emg_handlers or self.timed_emg_handlers:
+			emg1 = EMG_RAW.unpack_from(payload, 5)
+			emg2 = EMG_RAW.unpack_from(payload, 13)
+			if self.queueing:
+				if self.emg_handlers:
+					self.deliver_queued(self.on_emg, emg1, 0)
+					self.deliver_queued(self.on_emg, emg2, 0)
+				if self.timed_emg_handlers:
+					self.deliver_queued(self.on_timed_emg, t, emg1, 0)
+					self.deliver_queued(self.on_timed_emg, t + self.emg_clock.period, emg2, 0)
+			else:
+				for h in self.emg_handlers:
+					h(emg1, 0)
+				for h in self.emg_handlers:
+					h(emg2, 0)
+				for h in self.timed_emg_handlers:
+					h(t, emg1, 0)
+				for h in self.timed_emg_handlers:
+					h(t + self.emg_clock.period, emg2, 0)
+		if self.emg_batchers:
+			samples = np.frombuffer(payload, dtype=np.int8, count=16, offset=5).reshape(2, 8)
+			period = self.emg_clock.period if self.emg_timed else 1.0 / EMG_RATE
+			for b in self.emg_batchers:
+				b.push(samples, t, period)
+
+	def emg_time(self, attr):
+		'''
+		Time of the first sample of an EMG notification from attr that was just read.
+		Sample times are only worked out, by the SampleClock, once emg_timed
+		is set: by a timed EMG handler, a batch handler with timestamps, or
+		the first call to emg_timing. Until then this returns 0.0.
+		'''
+		if self.time_to_first_emg is None and self.connect_started is not None:
+			self.time_to_first_emg = self.bt.rx_time - self.connect_started
+		if not self.emg_timed:
+			return 0.0
+		clock = self.emg_clock
+		if clock is None or attr not in clock.position:
+			# First EMG, or the mode changed
+			clock = self.emg_clock = SampleClock.for_attr(attr)
+			self.emg_dropped = sum(self.bt.dropped[self.conn, a] for a in clock.order)
+
+		skipped = 0
+		if self.bt.dropped_packets != self.dropped_seen:
+			# The backpressure policy dropped packets since the last look, maybe EMG
+			self.dropped_seen = self.bt.dropped_packets
+			dropped = sum(self.bt.dropped[self.conn, a] for a in clock.order)
+			skipped = dropped - self.emg_dropped
+			self.emg_dropped = dropped
+		return clock.update(self.bt.rx_time, attr, skipped)
+
+	def stats(self):
+		'''
+		A snapshot of the health of the stream: notifications and samples
+		received by characteristic, their rates in samples per second over the
+		last 1, 5 and 30 seconds, and the dongle's counters: bytes read,
+		packets framed, bytes skipped as framing errors, and the notifications
+		dropped by the backpressure policy. emg_timing is the result of
+		emg_timing(), None the first time, time_to_first_emg the seconds
+		from connect() to the first EMG sample.
+		'''
+		def name(attr):
+			return ATTR_NAMES.get(attr, '0x%02x' % attr)
+
+		def samples(counts):
+			return {a: n * SAMPLES_PER_NOTIFICATION.get(a, 1) for a, n in counts.items() if n}
+
+		now = self.bt.rx_time
+		current = samples(self.notifications)
+		marks = list(self.marks)
+		hz = {}
+		for window in RATE_WINDOWS:
+			# The newest mark at least window seconds old, or the oldest one
+			old = None
+			for t, counts in reversed(marks):
+				old = (t, counts)
+				if t <= now - window:
+					break
+			rates = {}
+			if old is not None and now > old[0]:
+				before = samples(old[1])
+				for a, n in current.items():
+					rates[name(a)] = (n - before.get(a, 0)) / (now - old[0])
+			hz[window] = rates
+
+		framer = self.bt.framer
+		return {
+			'notifications': {name(a): n for a, n in self.notifications.items() if n},
+			'samples': {name(a): n for a, n in current.items()},
+			'hz': hz,
+			'bytes_read': self.bt.bytes_read,
+			'packets': framer.packets,
+			'framing_errors': framer.skipped,
+			'dropped': {name(a): n for (c, a), n in self.bt.dropped.items() if c == self.conn},
+			'dropped_packets': self.bt.dropped_packets,
+			'dropped_bytes': self.bt.dropped_bytes,
+			'unknown_attrs': {'0x%02x' % a: n for a, n in self.unknown_attrs.items()},
+			'queue_drops': self.queue_drops,
+			'queue_overflows': self.queue_overflows,
+			'emg_timing': self.emg_timing(),
+			'time_to_first_emg': self.time_to_first_emg,
+		}
+
+	def emg_timing(self):
+		'''
+		Rolling rate, jitter and gap statistics of the EMG stream, see
+		SampleClock.stats. They are gathered from the first call on, which returns None.
+		'''
+		self.emg_timed = True
+		if self.emg_clock is None:
+			return None
+		return self.emg_clock.stats()
+
+	def imu_time(self):
+		'''Time an IMU notification that was just read was taken, on a 50 Hz grid like emg_time.'''
+		if self.imu_clock is None:
+			self.imu_clock = SampleClock.for_attr(0x1c)
+			self.imu_dropped = self.bt.dropped[self.conn, 0x1c]
+		dropped = self.bt.dropped[self.conn, 0x1c]
+		skipped = dropped - self.imu_dropped
+		self.imu_dropped = dropped
+		return self.imu_clock.update(self.bt.rx_time, 0x1c, skipped)
+
+	def decode_imu(self, payload):
+		if self.imu_handlers:
+			vals = IMU.unpack_from(payload, 5)
+			quat, acc, gyro = vals[:4], vals[4:7], vals[7:10]
+			if self.queueing:
+				self.deliver_queued(self.on_imu, quat, acc, gyro)
+			else:
+				for h in self.imu_handlers:
+					h(quat, acc, gyro)
+		if self.imu_batchers:
+			t = self.imu_time()
+			raw = np.frombuffer(payload, dtype='<i2', count=10, offset=5)
+			for b in self.imu_batchers:
+				b.push(raw, t, self.imu_clock.period)
+
+	def decode_classifier(self, payload):
+		typ, val, xdir = CLASSIFIER.unpack_from(payload, 5)[:3]
+
+		if typ == 1:  # on arm
+			self.deliver(self.on_arm, Arm(val), XDirection(xdir))
+		elif typ == 2:  # removed from arm
+			self.deliver(self.on_arm, Arm.UNKNOWN, XDirection.UNKNOWN)
+		elif typ == 3:  # pose
+			self.deliver(self.on_pose, Pose(val))
+
+	def decode_battery(self, payload):
+		self.deliver(self.on_battery, payload[5])
 
 	def write_attr(self, attr, val):
 		if self.conn is not None:
-			self.bt.write_attr(self.conn, attr, val)
+			self.call(self.bt.write_attr, self.conn, attr, val)
+
+	def write_attrs(self, writes):
+		'''
+		Writes [(attr, value)] in order, less the writes that change nothing,
+		see dedupe_writes. Every write waits for the Myo to acknowledge it
+		before the next, unless pipeline is set: commands (handle 0x19) are
+		then written without response, and only the descriptor writes, which
+		BLE only allows one at a time, wait.
+		'''
+		if self.conn is not None:
+			unacknowledged = (COMMAND,) if self.pipeline else ()
+			self.call(self.bt.write_attrs, self.conn, dedupe_writes(writes), unacknowledged)
 
 	def read_attr(self, attr):
 		if self.conn is not None:
-			return self.bt.read_attr(self.conn, attr)
+			return self.call(self.bt.read_attr, self.conn, attr)
 		return None
 
 	def disconnect(self):
 		if self.conn is not None:
-			self.bt.disconnect(self.conn)
+			self.call(self.bt.disconnect, self.conn)
+
+	def close(self):
+		'''Stops background reading and releases the serial port.'''
+		self.stop()
+		self.bt.close()
+
+	def set_backpressure(self, policy, limit=None, keep=None):
+		'''What to drop when falling behind the Myo, see BT.set_backpressure.'''
+		self.bt.set_backpressure(policy, limit, keep)
+
+	def start_capture(self, path):
+		'''Records the raw BLE session to path, see BT.start_capture.'''
+		return self.bt.start_capture(path)
+
+	def stop_capture(self):
+		self.bt.stop_capture()
 
 	def sleep_mode(self, mode):
 		self.write_attr(0x19, pack('3B', 9, 1, mode))
@@ -423,10 +1574,7 @@ class Myo(object):
 		To get raw EMG signals, we subscribe to the four EMG notification
 		characteristics by writing a 0x0100 command to the corresponding handles.
 		'''
-		self.write_attr(0x2c, b'\x01\x00')  # Suscribe to EmgData0Characteristic
-		self.write_attr(0x2f, b'\x01\x00')  # Suscribe to EmgData1Characteristic
-		self.write_attr(0x32, b'\x01\x00')  # Suscribe to EmgData2Characteristic
-		self.write_attr(0x35, b'\x01\x00')  # Suscribe to EmgData3Characteristic
+		self.write_attrs(EMG_MODE_WRITES[emg_mode.FILTERED])
 
 		'''Bytes sent to handle 0x19 (command characteristic) have the following
 		format: [command, payload_size, EMG mode, IMU mode, classifier mode]
@@ -438,7 +1586,7 @@ class Myo(object):
 			0x01 -> send classifier events or dont (0x00)
 		'''
 		# struct.pack('<5B', 1, 3, emg_mode, imu_mode, classifier_mode)
-		self.write_attr(0x19, b'\x01\x03\x02\x01\x01')
+		# (0x19, b'\x01\x03\x02\x01\x01')
 
 		'''Sending this sequence for v1.0 firmware seems to enable both raw data and
 		pose notifications.
@@ -482,21 +1630,14 @@ class Myo(object):
 		However this seems to use a data rate of 50Hz.
 		'''
 
-		self.write_attr(0x28, b'\x01\x00')
-		self.write_attr(0x19, b'\x01\x03\x01\x01\x00')
+		self.write_attrs(EMG_MODE_WRITES[emg_mode.PREPROCESSED])
 
 	def start_raw_unfiltered(self):
 		'''
 		To get raw EMG signals, we subscribe to the four EMG notification
 		characteristics by writing a 0x0100 command to the corresponding handles.
 		'''
-		self.write_attr(0x2c, b'\x01\x00')  # Suscribe to EmgData0Characteristic
-		self.write_attr(0x2f, b'\x01\x00')  # Suscribe to EmgData1Characteristic
-		self.write_attr(0x32, b'\x01\x00')  # Suscribe to EmgData2Characteristic
-		self.write_attr(0x35, b'\x01\x00')  # Suscribe to EmgData3Characteristic
-
-		# struct.pack('<5B', 1, 3, emg_mode, imu_mode, classifier_mode)
-		self.write_attr(0x19, b'\x01\x03\x03\x01\x00')
+		self.write_attrs(EMG_MODE_WRITES[emg_mode.RAW])
 
 	def mc_start_collection(self):
 		'''Myo Connect sends this sequence (or a reordering) when starting data
@@ -504,18 +1645,21 @@ class Myo(object):
 		pose notifications.
 		'''
 
-		self.write_attr(0x28, b'\x01\x00')  # Suscribe to EMG notifications
-		self.write_attr(0x1d, b'\x01\x00')  # Suscribe to IMU notifications
-		self.write_attr(0x24, b'\x02\x00')  # Suscribe to classifier indications
-		self.write_attr(0x19, b'\x01\x03\x01\x01\x01')  # Set EMG and IMU, payload size = 3, EMG on, IMU on, classifier on
-		self.write_attr(0x28, b'\x01\x00')  # Suscribe to EMG notifications
-		self.write_attr(0x1d, b'\x01\x00')  # Suscribe to IMU notifications
-		self.write_attr(0x19, b'\x09\x01\x01\x00\x00')  # Set sleep mode, payload size = 1, never go to sleep, don't know, don't know
-		self.write_attr(0x1d, b'\x01\x00')  # Suscribe to IMU notifications
-		self.write_attr(0x19, b'\x01\x03\x00\x01\x00')  # Set EMG and IMU, payload size = 3, EMG off, IMU on, classifier off
-		self.write_attr(0x28, b'\x01\x00')  # Suscribe to EMG notifications
-		self.write_attr(0x1d, b'\x01\x00')  # Suscribe to IMU notifications
-		self.write_attr(0x19, b'\x01\x03\x01\x01\x00')  # Set EMG and IMU, payload size = 3, EMG on, IMU on, classifier off
+		# Myo Connect repeats some of these, write_attrs leaves the repeats out
+		self.write_attrs([
+			(0x28, NOTIFY),  # Suscribe to EMG notifications
+			(0x1d, NOTIFY),  # Suscribe to IMU notifications
+			(0x24, INDICATE),  # Suscribe to classifier indications
+			(COMMAND, b'\x01\x03\x01\x01\x01'),  # Set EMG and IMU, payload size = 3, EMG on, IMU on, classifier on
+			(0x28, NOTIFY),  # Suscribe to EMG notifications
+			(0x1d, NOTIFY),  # Suscribe to IMU notifications
+			(COMMAND, b'\x09\x01\x01\x00\x00'),  # Set sleep mode, payload size = 1, never go to sleep, don't know, don't know
+			(0x1d, NOTIFY),  # Suscribe to IMU notifications
+			(COMMAND, b'\x01\x03\x00\x01\x00'),  # Set EMG and IMU, payload size = 3, EMG off, IMU on, classifier off
+			(0x28, NOTIFY),  # Suscribe to EMG notifications
+			(0x1d, NOTIFY),  # Suscribe to IMU notifications
+			(COMMAND, b'\x01\x03\x01\x01\x00'),  # Set EMG and IMU, payload size = 3, EMG on, IMU on, classifier off
+		])
 
 	def mc_end_collection(self):
 		'''Myo Connect sends this sequence (or a reordering) when ending data collection
@@ -523,18 +1667,20 @@ class Myo(object):
 		doesn't disable raw data.
 		'''
 
-		self.write_attr(0x28, b'\x01\x00')
-		self.write_attr(0x1d, b'\x01\x00')
-		self.write_attr(0x24, b'\x02\x00')
-		self.write_attr(0x19, b'\x01\x03\x01\x01\x01')
-		self.write_attr(0x19, b'\x09\x01\x00\x00\x00')
-		self.write_attr(0x1d, b'\x01\x00')
-		self.write_attr(0x24, b'\x02\x00')
-		self.write_attr(0x19, b'\x01\x03\x00\x01\x01')
-		self.write_attr(0x28, b'\x01\x00')
-		self.write_attr(0x1d, b'\x01\x00')
-		self.write_attr(0x24, b'\x02\x00')
-		self.write_attr(0x19, b'\x01\x03\x01\x01\x01')
+		self.write_attrs([
+			(0x28, NOTIFY),
+			(0x1d, NOTIFY),
+			(0x24, INDICATE),
+			(COMMAND, b'\x01\x03\x01\x01\x01'),
+			(COMMAND, b'\x09\x01\x00\x00\x00'),
+			(0x1d, NOTIFY),
+			(0x24, INDICATE),
+			(COMMAND, b'\x01\x03\x00\x01\x01'),
+			(0x28, NOTIFY),
+			(0x1d, NOTIFY),
+			(0x24, INDICATE),
+			(COMMAND, b'\x01\x03\x01\x01\x01'),
+		])
 
 	def vibrate(self, length):
 		if length in range(1, 4):
@@ -551,9 +1697,72 @@ class Myo(object):
 	def add_emg_handler(self, h):
 		self.emg_handlers.append(h)
 
+	def add_timed_emg_handler(self, h):
+		'''
+		Like add_emg_handler, but h is called with (t, emg, moving), where t is
+		the reconstructed time.monotonic() at which the sample was taken.
+		'''
+		self.emg_timed = True
+		self.timed_emg_handlers.append(h)
+
+	def add_emg_batch_handler(self, h, size=50, latency=None, timestamps=False):
+		'''
+		h is called with (n, 8) NumPy arrays of EMG samples, int8 in the RAW
+		and FILTERED modes and uint16 in PREPROCESSED mode, once at least size
+		samples have arrived, or before latency seconds have passed since the
+		first sample of the batch: as soon as the next sample would come too
+		late, or from run() or the reader thread if the stream stalls.
+		With timestamps, h is called with (samples, t) instead, t holding the
+		reconstructed time of every sample, see add_timed_emg_handler.
+		Each call gets new arrays, which the handler is free to keep.
+		'''
+		if timestamps:
+			self.emg_timed = True
+		if latency is not None:
+			self.poll_port(latency)
+		self.emg_batchers.append(EmgBatcher(self, h, size, latency, timestamps))
+
+	def poll_port(self, latency):
+		'''
+		Makes reads from the port time out after at most a quarter of latency,
+		so run() gets to hand over a batch on time even if no packet comes.
+		Set once here, rather than around every read, as changing it
+		reconfigures the port.
+		'''
+		poll = latency / 4
+		if self.reader is not None:
+			# The reader thread polls the batches between its reads, this is for after stop()
+			if self.saved_timeout is None or self.saved_timeout > poll:
+				self.saved_timeout = poll
+		elif self.bt.ser.timeout is None or self.bt.ser.timeout > poll:
+			self.bt.ser.timeout = poll
+
+	def flush_emg_batches(self):
+		'''Hands any partial batches to the batch handlers.'''
+		for b in self.emg_batchers:
+			b.flush()
+
 	def add_imu_handler(self, h):
 		self.imu_handlers.append(h)
 
+	def add_imu_batch_handler(self, h, size=10, latency=None):
+		'''
+		h is called with NumPy structured arrays of IMU samples, in physical
+		units and with the time each was taken, once size samples have
+		arrived, or before latency seconds have passed since the first sample
+		of the batch, as with add_emg_batch_handler. See pyomyo.imu for the fields and for converting the
+		orientation to Euler angles or rotation matrices.
+		'''
+		from pyomyo.imu import ImuBatcher
+		if latency is not None:
+			self.poll_port(latency)
+		self.imu_batchers.append(ImuBatcher(self, h, size, latency))
+
+	def flush_imu_batches(self):
+		'''Hands any partial IMU batches to the batch handlers.'''
+		for b in self.imu_batchers:
+			b.flush()
+
 	def add_pose_handler(self, h):
 		self.pose_handlers.append(h)
 
@@ -567,6 +1776,10 @@ class Myo(object):
 		for h in self.emg_handlers:
 			h(emg, moving)
 
+	def on_timed_emg(self, t, emg, moving):
+		for h in self.timed_emg_handlers:
+			h(t, emg, moving)
+
 	def on_imu(self, quat, acc, gyro):
 		for h in self.imu_handlers:
 			h(quat, acc, gyro)
@@ -583,6 +1796,115 @@ class Myo(object):
 		for h in self.battery_handlers:
 			h(battery_level)
 
+class MultiMyo(object):
+	'''
+	Several Myos on one dongle, read by one loop.
+
+	Notifications are routed to the right Myo by their connection handle, and
+	the handlers added here get the device id (the index in myos) first:
+	emg handlers are called with (device_id, emg, moving), and so on.
+	The BLED112 keeps up to 3 connections by default.
+	'''
+
+	def __init__(self, count=2, tty=None, mode=1, bulk=True, timeout=None):
+		if tty is None:
+			tty = Myo.detect_tty()
+		if tty is None:
+			raise ValueError('Myo dongle not found!')
+
+		self.bt = BT(tty, bulk=bulk, timeout=timeout)
+		self.myos = [Myo(mode=mode, bt=self.bt) for _ in range(count)]
+		# Connection handle -> Myo
+		self.by_conn = {}
+		self.emg_handlers = []
+		self.imu_handlers = []
+		self.arm_handlers = []
+		self.pose_handlers = []
+		self.battery_handlers = []
+
+		for i, m in enumerate(self.myos):
+			m.add_emg_handler(lambda emg, moving, i=i: self.on_emg(i, emg, moving))
+			m.add_imu_handler(lambda quat, acc, gyro, i=i: self.on_imu(i, quat, acc, gyro))
+			m.add_arm_handler(lambda arm, xdir, i=i: self.on_arm(i, arm, xdir))
+			m.add_pose_handler(lambda p, i=i: self.on_pose(i, p))
+			m.add_battery_handler(lambda battery_level, i=i: self.on_battery(i, battery_level))
+
+	def connect(self, addrs=None, timeout=None):
+		'''
+		Connect every Myo, to the MAC addresses in addrs or to the first ones
+		found by scanning. timeout applies to each Myo.
+		'''
+		addrs = list(addrs) if addrs is not None else [None] * len(self.myos)
+
+		# stop everything from before, once
+		self.bt.end_scan()
+		for h in range(3):
+			self.bt.disconnect(h)
+
+		# Routes the Myos already connected while the next one scans and handshakes
+		self.by_conn.clear()
+		self.bt.remove_handler(self.handle_data)
+		self.bt.add_handler(self.handle_data)
+
+		for m, addr in zip(self.myos, addrs):
+			m.connect(addr, timeout=timeout, reset=False, exclude=[o.addr for o in self.myos if o.addr])
+			# One handler looks the connection up instead of every Myo checking every packet
+			self.bt.remove_handler(m.handle_data)
+			self.by_conn[m.conn] = m
+
+	def handle_data(self, p):
+		if p.cls != 4 or p.cmd != 5:
+			return
+		m = self.by_conn.get(p.payload[0])
+		if m is not None:
+			m.handle_data(p)
+
+	def run(self):
+		self.bt.recv_packet()
+
+	def disconnect(self):
+		for m in self.myos:
+			m.disconnect()
+		self.by_conn.clear()
+
+	def close(self):
+		self.bt.close()
+
+	def add_emg_handler(self, h):
+		self.emg_handlers.append(h)
+
+	def add_imu_handler(self, h):
+		self.imu_handlers.append(h)
+
+	def add_pose_handler(self, h):
+		self.pose_handlers.append(h)
+
+	def add_arm_handler(self, h):
+		self.arm_handlers.append(h)
+
+	def add_battery_handler(self, h):
+		self.battery_handlers.append(h)
+
+	def on_emg(self, device_id, emg, moving):
+		for h in self.emg_handlers:
+			h(device_id, emg, moving)
+
+	def on_imu(self, device_id, quat, acc, gyro):
+		for h in self.imu_handlers:
+			h(device_id, quat, acc, gyro)
+
+	def on_pose(self, device_id, p):
+		for h in self.pose_handlers:
+			h(device_id, p)
+
+	def on_arm(self, device_id, arm, xdir):
+		for h in self.arm_handlers:
+			h(device_id, arm, xdir)
+
+	def on_battery(self, device_id, battery_level):
+		for h in self.battery_handlers:
+			h(device_id, battery_level)
+
 if __name__ == '__main__':
 	m = Myo(sys.argv[1] if len(sys.argv) >= 2 else None, mode=emg_mode.RAW)
 
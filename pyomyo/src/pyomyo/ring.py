@@ -0,0 +1,227 @@
+'''
+A ring buffer in shared memory, to pass samples between processes without
+pickling them.
+
+One process writes rows, any number of processes attach by name and read
+them as NumPy views. Every row gets a sequence number, the number of rows
+written before it, so a reader can tell exactly how many it missed when it
+fell more than a ring behind.
+
+	ring = SharedRing.create('emg', capacity=4096, width=8, dtype=np.int8)
+	ring.write(samples)
+
+	# in another process
+	ring = SharedRing.attach('emg')
+	cursor = ring.cursor()
+	while True:
+		rows = cursor.next(timeout=1.0) # the rows written since the last call
+		...
+		if cursor.lost:
+			print('fell behind by', cursor.lost, 'rows')
+
+Needs Python 3.8 or later for multiprocessing.shared_memory.
+'''
+
+from multiprocessing import resource_tracker, shared_memory
+import time
+
+import numpy as np
+
+MAGIC = b'PMRB'
+VERSION = 1
+HEADER = np.dtype([
+	('magic', 'S4'),
+	('version', '<u4'),
+	('capacity', '<i8'),
+	('width', '<i8'),
+	('dtype', 'S8'),
+	# Rows written since the ring was created, only ever increased by the writer
+	('count', '<i8'),
+])
+HEADER_SIZE = 64
+
+
+def open_untracked(name):
+	'''
+	Opens existing shared memory without registering it with the resource
+	tracker, which would unlink it when this process exits, as if it had
+	created it. Python 3.13 has track=False for that.
+	'''
+	try:
+		return shared_memory.SharedMemory(name=name, track=False)
+	except TypeError:
+		pass
+	register = resource_tracker.register
+
+	def register_others(name, rtype):
+		if rtype != 'shared_memory':
+			register(name, rtype)
+	resource_tracker.register = register_others
+	try:
+		return shared_memory.SharedMemory(name=name)
+	finally:
+		resource_tracker.register = register
+
+
+class SharedRing(object):
+	'''
+	A ring buffer of fixed width rows in shared memory, one writer, any
+	number of readers.
+
+	Every row is stored twice, capacity rows apart, so any window of up to
+	capacity rows is contiguous and reading never has to copy. The oldest row
+	of a window of n rows is overwritten once the writer has written
+	capacity - n more, copy a window to keep it longer, or check valid().
+	'''
+
+	def __init__(self, shm, owner):
+		self.shm = shm
+		self.owner = owner
+		self.header = np.ndarray((), dtype=HEADER, buffer=shm.buf)
+		if self.header['magic'].item() != MAGIC or self.header['version'] != VERSION:
+			self.header = None
+			raise ValueError('%s is not a pyomyo ring' % shm.name)
+		self.name = shm.name
+		self.capacity = int(self.header['capacity'])
+		self.width = int(self.header['width'])
+		self.dtype = np.dtype(self.header['dtype'].item().decode())
+		self.data = np.ndarray((2 * self.capacity, self.width), dtype=self.dtype, buffer=shm.buf, offset=HEADER_SIZE)
+		if not owner:
+			self.data.flags.writeable = False
+
+	@classmethod
+	def create(cls, name, capacity, width, dtype):
+		'''Creates the shared memory for a ring of capacity rows of width values of dtype.'''
+		dtype = np.dtype(dtype)
+		size = HEADER_SIZE + 2 * capacity * width * dtype.itemsize
+		shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+		header = np.ndarray((), dtype=HEADER, buffer=shm.buf)
+		header['magic'] = MAGIC
+		header['version'] = VERSION
+		header['capacity'] = capacity
+		header['width'] = width
+		header['dtype'] = dtype.str.encode()
+		header['count'] = 0
+		del header
+		return cls(shm, owner=True)
+
+	@classmethod
+	def attach(cls, name, writer=False):
+		'''
+		Opens the ring called name, created by another process. Detaching
+		(close) leaves it to its creator, which unlinks it.
+		'''
+		ring = cls(open_untracked(name), owner=False)
+		if writer:
+			ring.data.flags.writeable = True
+		return ring
+
+	@property
+	def count(self):
+		'''Rows written so far, which is also the sequence number of the next row.'''
+		return int(self.header['count'])
+
+	# writing
+	def write(self, rows):
+		'''Appends rows, an (n, width) array or a single row.'''
+		rows = np.asarray(rows, dtype=self.dtype).reshape(-1, self.width)
+		count = int(self.header['count'])
+		n = len(rows)
+		cap = self.capacity
+		if n > cap:
+			rows = rows[-cap:]
+		k = len(rows)
+		i = (count + n - k) % cap
+		first = min(k, cap - i)
+		data = self.data
+		data[i:i + first] = rows[:first]
+		data[i + cap:i + cap + first] = rows[:first]
+		if k > first:
+			data[:k - first] = rows[first:]
+			data[cap:cap + k - first] = rows[first:]
+		# Publish the rows only once they are written
+		self.header['count'] = count + n
+
+	# reading
+	def latest(self, n):
+		'''A view of the last n rows, oldest first, fewer if fewer were written.'''
+		count = int(self.header['count'])
+		n = min(n, count, self.capacity)
+		start = (count - n) % self.capacity
+		return self.data[start:start + n]
+
+	def read(self, seq):
+		'''
+		The rows from sequence number seq on, as (view, next seq, lost), where
+		lost counts the rows from seq that were already overwritten.
+		'''
+		count = int(self.header['count'])
+		start = min(max(seq, count - self.capacity), count)
+		lost = start - seq if start > seq else 0
+		i = start % self.capacity
+		return self.data[i:i + count - start], count, lost
+
+	def valid(self, seq):
+		'''Whether the row with sequence number seq, and those after it, are still in the ring.'''
+		return int(self.header['count']) - seq <= self.capacity
+
+	def wait(self, seq, timeout=None):
+		'''
+		Waits until the row with sequence number seq has been written.
+		Returns False if it hasn't within timeout seconds.
+		'''
+		if int(self.header['count']) > seq:
+			return True
+		deadline = None if timeout is None else time.monotonic() + timeout
+		# Poll, backing off from 0.2 to 5 ms, there is nothing to block on across processes
+		delay = 0.0002
+		while int(self.header['count']) <= seq:
+			if deadline is not None:
+				left = deadline - time.monotonic()
+				if left <= 0:
+					return False
+				delay = min(delay, left)
+			time.sleep(delay)
+			delay = min(delay * 2, 0.005)
+		return True
+
+	def cursor(self, seq=None):
+		'''A RingCursor reading from sequence number seq on, by default from the next row written.'''
+		return RingCursor(self, self.count if seq is None else seq)
+
+	def close(self):
+		'''Detaches. The memory stays mapped while views of the ring are still around.'''
+		self.header = None
+		self.data = None
+		try:
+			self.shm.close()
+		except BufferError:
+			# Views still point into it, it is unmapped once they are gone
+			pass
+
+	def unlink(self):
+		'''Frees the shared memory, once every process has detached.'''
+		self.shm.unlink()
+
+
+class RingCursor(object):
+	'''
+	Reads every row of a SharedRing once, in order. seq is the sequence
+	number of the next row to read, lost the rows overwritten before they
+	could be read.
+	'''
+
+	def __init__(self, ring, seq):
+		self.ring = ring
+		self.seq = seq
+		self.lost = 0
+
+	def next(self, timeout=None):
+		'''
+		Waits for new rows and returns a view of all of them. The view is
+		empty if none came within timeout seconds.
+		'''
+		self.ring.wait(self.seq, timeout)
+		rows, self.seq, lost = self.ring.read(self.seq)
+		self.lost += lost
+		return rows
@@ -0,0 +1,399 @@
+'''
+A simulated BLED112 dongle with Myos attached, for testing and benchmarking
+without hardware.
+
+SimSerial is a fake serial port that speaks enough of the BLED112 protocol
+for BT and Myo to run unmodified against it: scanning, connecting,
+attribute reads and writes, and EMG, IMU and battery notifications.
+
+	from pyomyo import Myo, emg_mode
+	from pyomyo.sim import SimMyo, SimSerial
+
+	m = Myo(SimSerial(SimMyo.from_csv('10_test_emg.csv')), mode=emg_mode.PREPROCESSED)
+	m.connect()
+
+By default the stream runs in real time, speed=N runs it N times faster
+and speed=None as fast as the reader can take it.
+'''
+
+import csv
+import heapq
+import math
+import random
+import struct
+import threading
+import time
+
+from pyomyo.pyomyo import MYO_SCAN_UUID
+
+# Client characteristic configuration handle -> the handle it enables
+CCCD = {0x2c: 0x2b, 0x2f: 0x2e, 0x32: 0x31, 0x35: 0x34, 0x28: 0x27, 0x1d: 0x1c, 0x24: 0x23, 0x12: 0x11}
+EMG_ATTRS = (0x2b, 0x2e, 0x31, 0x34)
+# BLED112 result codes
+NOT_CONNECTED = 0x0186
+
+def response(cls, cmd, payload=b''):
+	'''Encode a BLED112 response packet.'''
+	return struct.pack('<4B', len(payload) >> 8, len(payload) & 0xff, cls, cmd) + payload
+
+def event(cls, cmd, payload=b''):
+	'''Encode a BLED112 event packet.'''
+	return struct.pack('<4B', 0x80 | (len(payload) >> 8), len(payload) & 0xff, cls, cmd) + payload
+
+def attribute_value(conn, attr, value, typ=1):
+	'''Encode an attribute value event (4, 5), typ 0 for reads and 1 for notifications.'''
+	return event(4, 5, struct.pack('<BHBB', conn, attr, typ, len(value)) + value)
+
+def synthetic_emg(n=2000, seed=0):
+	'''A few seconds of made up 8 channel EMG, bursts of activity over noise.'''
+	rnd = random.Random(seed)
+	rows = []
+	for i in range(n):
+		env = 0.5 + 0.5 * math.sin(2 * math.pi * i / 400.0)
+		rows.append(tuple(int(env * 60 * math.sin(i * (0.7 + 0.13 * ch)) + rnd.gauss(0, 4)) for ch in range(8)))
+	return rows
+
+
+class SimMyo(object):
+	'''
+	One simulated Myo.
+	emg is a list of 8 value rows that are played back in a loop, in RAW and
+	FILTERED modes they are clipped to int8, in PREPROCESSED mode to uint16.
+	'''
+
+	def __init__(self, addr=(93, 41, 55, 245, 82, 194), emg=None, firmware=(1, 5, 1970, 2),
+			name=b'Myo', battery=100, present=True):
+		self.addr = bytes(addr)
+		self.emg = emg if emg is not None else synthetic_emg()
+		self.firmware = firmware
+		self.name = name
+		self.battery = battery
+		# A Myo that is not present never answers a connection attempt
+		self.present = present
+
+	@classmethod
+	def from_csv(cls, path, **kwargs):
+		'''Plays back the first 8 columns of a CSV such as MyoDataset.csv or 10_test_emg.csv.'''
+		rows = []
+		with open(path, newline='') as f:
+			reader = csv.reader(f)
+			next(reader)
+			for row in reader:
+				rows.append(tuple(int(float(v)) for v in row[:8]))
+		return cls(emg=rows, **kwargs)
+
+	def attribute(self, attr):
+		if attr == 0x17:
+			return struct.pack('<4H', *self.firmware)
+		if attr == 0x03:
+			return self.name
+		if attr == 0x11:
+			return struct.pack('<B', self.battery)
+		return b''
+
+
+class Link(object):
+	'''The state of one simulated connection.'''
+
+	def __init__(self, handle, myo, now):
+		self.handle = handle
+		self.myo = myo
+		self.subscribed = set()
+		self.emg_mode = 0
+		self.imu_mode = 0
+		self.stream_start = now
+		# Number of notifications already sent for each stream
+		self.sent = {'emg': 0, 'imu': 0}
+		self.emg_index = 0
+		# A GATT procedure can only start once the previous one is done
+		self.busy_until = now
+
+
+class SimSerial(object):
+	'''
+	A fake serial port with a simulated BLED112 and Myos behind it.
+
+	speed scales the simulated clock, None runs the streams as fast as they
+	are read. interval is the BLE connection interval, every GATT procedure
+	takes two of them, and scan_delay is how long until a Myo advertises,
+	for a scan to see it or a connection attempt to reach it.
+	'''
+
+	def __init__(self, *myos, speed=1.0, interval=0.0, scan_delay=0.0, emg_hz=200, imu_hz=50, timeout=None):
+		self.myos = list(myos) or [SimMyo()]
+		self.speed = speed
+		self.interval = interval
+		self.scan_delay = scan_delay
+		self.emg_hz = emg_hz
+		self.imu_hz = imu_hz
+		self.timeout = timeout
+		self.is_open = True
+
+		self.lock = threading.RLock()
+		self.t0 = time.monotonic()
+		self.out = bytearray()
+		self.inbuf = bytearray()
+		# (due, seq, bytes or function) for responses, events and writes that are not done yet
+		self.scheduled = []
+		self.seq = 0
+		self.links = {}
+		self.scanning = False
+
+		# What the host asked for, for tests
+		self.commands = []
+		self.writes = []
+
+	# clock
+	def now(self):
+		if self.speed is None:
+			return float('inf')
+		return (time.monotonic() - self.t0) * self.speed
+
+	def schedule(self, data, delay=0.0):
+		'''Sends data, bytes, after delay, or calls it if it is a function.'''
+		if self.speed is None and callable(data):
+			# No clock to wait for
+			data()
+			return
+		now = self.now()
+		due = 0.0 if self.speed is None else now + delay
+		heapq.heappush(self.scheduled, (due, self.seq, data))
+		self.seq += 1
+
+	# serial port interface
+	def write(self, data):
+		with self.lock:
+			self.inbuf += data
+			while len(self.inbuf) >= 4:
+				n = 4 + ((self.inbuf[0] & 0x07) << 8) + self.inbuf[1]
+				if len(self.inbuf) < n:
+					break
+				packet = bytes(self.inbuf[:n])
+				del self.inbuf[:n]
+				self.command(packet[2], packet[3], packet[4:])
+		return len(data)
+
+	def inWaiting(self):
+		with self.lock:
+			self.pump()
+			return len(self.out)
+
+	in_waiting = property(inWaiting)
+
+	def read(self, size=1):
+		deadline = None if self.timeout is None else time.monotonic() + self.timeout
+		while True:
+			with self.lock:
+				self.pump()
+				if len(self.out) >= size or (deadline is not None and time.monotonic() >= deadline):
+					data = bytes(self.out[:size])
+					del self.out[:size]
+					return data
+				wait = self.next_due() - self.now()
+			if self.speed is not None:
+				wait = max(wait / self.speed, 0.0005)
+			else:
+				wait = 0.0005
+			if deadline is not None:
+				wait = min(wait, max(deadline - time.monotonic(), 0))
+			time.sleep(min(wait, 0.05))
+
+	def flushInput(self):
+		with self.lock:
+			self.pump()
+			self.out.clear()
+
+	reset_input_buffer = flushInput
+
+	def close(self):
+		self.is_open = False
+
+	# the simulated dongle
+	def next_due(self):
+		due = self.scheduled[0][0] if self.scheduled else float('inf')
+		for link in self.links.values():
+			due = min(due, self.next_notification(link))
+		return due
+
+	def pump(self):
+		'''Moves everything that is due by now to the output buffer.'''
+		now = self.now()
+		if self.speed is None:
+			now = self.fast_forward()
+		while self.scheduled and self.scheduled[0][0] <= now:
+			data = heapq.heappop(self.scheduled)[2]
+			if callable(data):
+				data()
+			else:
+				self.out += data
+		for link in list(self.links.values()):
+			self.stream(link, now)
+
+	def fast_forward(self):
+		'''With speed=None, advance the streams a little whenever the reader runs low.'''
+		if len(self.out) >= 4096:
+			return 0.0
+		due = [self.next_notification(link) for link in self.links.values()]
+		due = [d for d in due if d != float('inf')]
+		return min(due) + 0.05 if due else float('inf')
+
+	def command(self, cls, cmd, payload):
+		self.commands.append((cls, cmd))
+		if (cls, cmd) == (0, 6):
+			# system_get_connections
+			self.schedule(response(0, 6, b'\x03'))
+		elif (cls, cmd) == (6, 2):
+			# gap_discover
+			self.schedule(response(6, 2, b'\x00\x00'))
+			self.scanning = True
+			for i, myo in enumerate(self.myos):
+				# Something that isn't a Myo first, then the Myo
+				self.schedule(event(6, 0, struct.pack('<bB6sBBB', -80, 0, bytes(6), 0, 255, 3) + b'\x02\x01\x06'), self.scan_delay)
+				data = b'\x02\x01\x06\x11' + MYO_SCAN_UUID
+				scan = event(6, 0, struct.pack('<bB6sBBB', -50, 0, myo.addr, 0, 255, len(data)) + data)
+				self.schedule(scan, self.scan_delay * (i + 1))
+		elif (cls, cmd) == (6, 4):
+			# gap_end_procedure, drop scan responses that haven't been sent yet
+			self.scanning = False
+			self.scheduled = [s for s in self.scheduled if callable(s[2]) or s[2][2:4] != b'\x06\x00']
+			heapq.heapify(self.scheduled)
+			self.schedule(response(6, 4, b'\x00\x00'))
+		elif (cls, cmd) == (6, 3):
+			self.connect(payload)
+		elif (cls, cmd) == (3, 0):
+			# connection_disconnect
+			handle = payload[0]
+			if handle in self.links:
+				del self.links[handle]
+				self.schedule(response(3, 0, struct.pack('<BH', handle, 0)))
+				self.schedule(event(3, 4, struct.pack('<BH', handle, 0x0216)), self.interval)
+			else:
+				self.schedule(response(3, 0, struct.pack('<BH', handle, NOT_CONNECTED)))
+		elif (cls, cmd) == (4, 4):
+			# attclient_read_by_handle
+			handle, attr = struct.unpack('<BH', payload[:3])
+			link = self.links.get(handle)
+			self.schedule(response(4, 4, struct.pack('<BH', handle, 0 if link else NOT_CONNECTED)))
+			if link:
+				done = self.procedure(link, 2 * self.interval)
+				self.schedule(attribute_value(handle, attr, link.myo.attribute(attr), typ=0), done)
+		elif (cls, cmd) in [(4, 5), (4, 6)]:
+			# attclient_attribute_write and attclient_write_command
+			handle, attr, n = struct.unpack('<BHB', payload[:4])
+			link = self.links.get(handle)
+			self.schedule(response(cls, cmd, struct.pack('<BH', handle, 0 if link else NOT_CONNECTED)))
+			if link:
+				val = bytes(payload[4:4 + n])
+				self.writes.append((attr, val))
+				if cmd == 5:
+					done = self.procedure(link, 2 * self.interval)
+					# The request reaches the Myo a connection interval before the response comes back
+					self.schedule(lambda: self.write_attr(link, attr, val), done - self.interval)
+					self.schedule(event(4, 1, struct.pack('<BHH', handle, 0, attr)), done)
+				else:
+					# A write command goes out with the next connection event, procedure or not
+					self.schedule(lambda: self.write_attr(link, attr, val), self.interval)
+		else:
+			# Anything else succeeds
+			self.schedule(response(cls, cmd, b'\x00\x00'))
+
+	def procedure(self, link, duration):
+		'''Queues a GATT procedure on link, returns the delay until it completes.'''
+		now = self.now() if self.speed is not None else 0.0
+		link.busy_until = max(link.busy_until, now) + duration
+		return link.busy_until - now
+
+	def connect(self, payload):
+		addr = bytes(payload[:6])
+		handle = 0
+		while handle in self.links:
+			handle += 1
+		self.schedule(response(6, 3, struct.pack('<HB', 0, handle)))
+		for myo in self.myos:
+			if myo.addr == addr and myo.present:
+				now = self.now() if self.speed is not None else 0.0
+				self.links[handle] = Link(handle, myo, now)
+				status = struct.pack('<BB6sBHHHB', handle, 5, addr, 0, 6, 64, 0, 255)
+				# The dongle connects on the Myo's next advertisement
+				self.schedule(event(3, 0, status), self.scan_delay + self.interval)
+				return
+
+	def write_attr(self, link, attr, val):
+		if self.links.get(link.handle) is not link:
+			# Disconnected meanwhile
+			return
+		if attr in CCCD:
+			if val[:1] == b'\x00':
+				link.subscribed.discard(CCCD[attr])
+			else:
+				link.subscribed.add(CCCD[attr])
+				if attr == 0x12:
+					# The current level, once the write has completed
+					self.schedule(attribute_value(link.handle, 0x11, link.myo.attribute(0x11)), self.procedure(link, self.interval))
+		elif attr == 0x19 and val[:1] == b'\x01' and len(val) >= 4:
+			# Set EMG and IMU mode
+			link.emg_mode, link.imu_mode = val[2], val[3]
+			link.stream_start = self.now() if self.speed is not None else 0.0
+			link.sent = {'emg': 0, 'imu': 0}
+		elif attr == 0x19 and val[:1] == b'\x04':
+			# Deep sleep, the Myo drops the connection
+			del self.links[link.handle]
+			self.schedule(event(3, 4, struct.pack('<BH', link.handle, 0x0208)), self.interval)
+
+	# notification streams
+	def emg_rate(self, link):
+		'''Notifications per second of the EMG stream, 0 when it is off.'''
+		if link.emg_mode in (2, 3) and link.subscribed.intersection(EMG_ATTRS):
+			return self.emg_hz / 2.0
+		if link.emg_mode == 1 and 0x27 in link.subscribed:
+			return 50.0
+		return 0.0
+
+	def imu_rate(self, link):
+		if link.imu_mode and 0x1c in link.subscribed:
+			return float(self.imu_hz)
+		return 0.0
+
+	def next_notification(self, link):
+		due = float('inf')
+		for stream, rate in [('emg', self.emg_rate(link)), ('imu', self.imu_rate(link))]:
+			if rate:
+				due = min(due, link.stream_start + (link.sent[stream] + 1) / rate)
+		return due
+
+	def stream(self, link, now):
+		emg_rate = self.emg_rate(link)
+		imu_rate = self.imu_rate(link)
+		while True:
+			t_emg = link.stream_start + (link.sent['emg'] + 1) / emg_rate if emg_rate else float('inf')
+			t_imu = link.stream_start + (link.sent['imu'] + 1) / imu_rate if imu_rate else float('inf')
+			t = min(t_emg, t_imu)
+			if t > now or t == float('inf'):
+				return
+			if t_emg <= t_imu:
+				self.out += self.emg_notification(link)
+				link.sent['emg'] += 1
+			else:
+				self.out += self.imu_notification(link, t)
+				link.sent['imu'] += 1
+
+	def next_row(self, link):
+		rows = link.myo.emg
+		row = rows[link.emg_index % len(rows)]
+		link.emg_index += 1
+		return row
+
+	def emg_notification(self, link):
+		if link.emg_mode == 1:
+			row = [min(max(v, 0), 0xffff) for v in self.next_row(link)]
+			return attribute_value(link.handle, 0x27, struct.pack('<8HB', *(row + [0])))
+		rows = [min(max(v, -128), 127) for _ in range(2) for v in self.next_row(link)]
+		attr = EMG_ATTRS[link.sent['emg'] % 4]
+		return attribute_value(link.handle, attr, struct.pack('<16b', *rows))
+
+	def imu_notification(self, link, t):
+		# A slow turn about z, with gravity along z
+		a = 0.5 * t
+		quat = [int(16384 * math.cos(a / 2)), 0, 0, int(16384 * math.sin(a / 2))]
+		vals = quat + [0, 0, 2048] + [0, 0, int(16 * math.degrees(0.5))]
+		return attribute_value(link.handle, 0x1c, struct.pack('<10h', *vals))
@@ -0,0 +1,47 @@
+'''Replaying a capture through the driver gives back what the live session got.'''
+
+import time
+
+from pyomyo import Myo, emg_mode
+from pyomyo.capture import ReplaySerial
+from pyomyo.sim import SimMyo, SimSerial
+
+
+def record(path, seconds):
+	m = Myo(SimSerial(SimMyo(), speed=10), mode=emg_mode.RAW)
+	emg = []
+	m.add_emg_handler(lambda e, moving: emg.append(e))
+	m.start_capture(path)
+	m.connect()
+	end = time.monotonic() + seconds
+	while time.monotonic() < end or m.bt.pending:
+		m.run()
+	m.stop_capture()
+	return emg
+
+
+def replay(path, speed):
+	m = Myo(ReplaySerial(path, speed=speed), mode=emg_mode.RAW)
+	emg = []
+	m.add_emg_handler(lambda e, moving: emg.append(e))
+	m.connect()
+	while not m.bt.ser.done or m.bt.pending:
+		m.run()
+	return emg, m.bt.dropped
+
+
+def test_replay_as_fast_as_read_matches_live(tmp_path):
+	path = str(tmp_path / 'session.cap')
+	live = record(path, 0.3)
+	assert len(live) > 500
+	emg, dropped = replay(path, None)
+	assert not dropped
+	assert emg == live
+
+
+def test_replay_in_real_time_matches_live(tmp_path):
+	path = str(tmp_path / 'session.cap')
+	live = record(path, 0.1)
+	emg, dropped = replay(path, 1.0)
+	assert not dropped
+	assert emg == live